@@ -9,44 +9,73 @@ from __future__ import annotations
 
 import datetime
 import logging
+import time
 from typing import TYPE_CHECKING, Any
 
 from homeassistant.components import webhook
 from homeassistant.const import (
+    EVENT_HOMEASSISTANT_STOP,
     Platform,
 )
+from homeassistant.core import CoreState, Event, callback
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
 
 from custom_components.dpk_ek_scraper.config import ScraperConfig
 
 from .api import ScraperApiClient
+from .api_models import PayloadError
+from .compression import CHUNK_SIZE, async_read_body
 from .const import (
     CONF_CLASS,
+    CONF_COALESCE_MAX_LATENCY,
+    CONF_COALESCE_WINDOW,
     CONF_DEPART,
     CONF_DEST,
+    CONF_GROUP,
+    CONF_LOCAL_COMBINE,
     CONF_MAX_DURATION,
     CONF_MAX_LEGS,
+    CONF_MIN_STAY,
     CONF_ORIGIN,
+    CONF_PRICE_DEADBAND,
     CONF_RETURN,
+    CONF_SCRAPER_URL,
+    CONF_TOP_K,
     CONF_WEBHOOK,
+    DEFAULT_COALESCE_MAX_LATENCY,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_SCRAPER_URL,
     DOMAIN,
+    METRIC_SETUP,
+    METRIC_WEBHOOK_READ,
+    STARTUP_STAGGER,
+    STATISTICS_FLUSH_INTERVAL,
 )
 from .coordinator import ScraperDataUpdateCoordinator
+from .services import async_setup_services
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
     from .data import ScraperConfigEntry
 
 PLATFORMS: list[Platform] = [
     Platform.SENSOR,
 ]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 # https://homeassistantapi.readthedocs.io/en/latest/api.html
 
 _LOGGER = logging.getLogger(__name__)
-TODAY = datetime.datetime.now(tz=datetime.UTC).date().isoformat()
+
+
+def _today() -> str:
+    """Return today's date (UTC) in ISO format, evaluated when called."""
+    return datetime.datetime.now(tz=datetime.UTC).date().isoformat()
 
 
 def get_option(entry: ConfigEntry, key: str, default: Any = None) -> Any:
@@ -69,22 +98,52 @@ def get_option(entry: ConfigEntry, key: str, default: Any = None) -> Any:
     return entry.options.get(key, entry.data.get(key, default))
 
 
-# https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
-async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ScraperConfigEntry,
-) -> bool:
-    """Set up this integration using UI."""
-    cfg = ScraperConfig(
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    """Set up the services shared by all entries."""
+    async_setup_services(hass)
+    return True
+
+
+def _build_config(entry: ConfigEntry) -> ScraperConfig:
+    """Build the scraper configuration of a config entry."""
+    return ScraperConfig(
         origin=get_option(entry, CONF_ORIGIN, "LON"),
         destination=get_option(entry, CONF_DEST, "DXB"),
         departure_date=get_option(entry, CONF_DEPART),
-        return_date=get_option(entry, CONF_RETURN, TODAY),
+        return_date=get_option(entry, CONF_RETURN) or _today(),
         max_legs=get_option(entry, CONF_MAX_LEGS, 2),
         max_duration=get_option(entry, CONF_MAX_DURATION, 15.5),
         ticket_class=get_option(entry, CONF_CLASS, "Economy"),
         webhook_id=get_option(entry, CONF_WEBHOOK),
+        scraper_url=get_option(entry, CONF_SCRAPER_URL, DEFAULT_SCRAPER_URL),
+        price_deadband=float(get_option(entry, CONF_PRICE_DEADBAND, 0.0)),
+        group=get_option(entry, CONF_GROUP, ""),
+        local_combine=bool(get_option(entry, CONF_LOCAL_COMBINE, False)),  # noqa: FBT003
+        min_stay=float(get_option(entry, CONF_MIN_STAY, 0.0)),
+        top_k=int(get_option(entry, CONF_TOP_K, 200)),
+        coalesce_window=float(
+            get_option(entry, CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW)
+        ),
+        coalesce_max_latency=float(
+            get_option(entry, CONF_COALESCE_MAX_LATENCY, DEFAULT_COALESCE_MAX_LATENCY)
+        ),
     )
+
+
+# https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ScraperConfigEntry,
+) -> bool:
+    """
+    Set up this integration using UI.
+
+    Setup does not wait for the scraper: sensors are created from the result
+    saved before the last restart (or none), and the first trigger runs in
+    the background, staggered across entries while Home Assistant starts.
+    """
+    start = time.perf_counter()
+    cfg = _build_config(entry)
     _LOGGER.debug("Config entry options: %s", entry.options)
     _LOGGER.debug("Config entry data: %s", entry.data)
     _LOGGER.debug("Using webhook_id: %s", cfg.webhook_id)
@@ -102,8 +161,22 @@ async def async_setup_entry(
 
     async def handle_webhook(hass: HomeAssistant, webhook_id, request) -> None:  # noqa: ANN001, ARG001
         _LOGGER.debug("Received webhook for job %s", webhook_id)
-        payload = await request.json()
-        await coordinator.async_handle_webhook(payload)
+        # gzip/deflate/zstd bodies are decoded as they stream in
+        try:
+            with coordinator.metrics.timer(METRIC_WEBHOOK_READ):
+                body = await async_read_body(request.content.iter_chunked(CHUNK_SIZE))
+        except PayloadError as err:
+            coordinator.metrics.incr(f"rejected_{err.reason}")
+            _LOGGER.warning(
+                "Rejected webhook body for job %s: %s", coordinator.job_id, err
+            )
+            return
+        coordinator.metrics.incr("webhook_bytes", len(body))
+        await coordinator.async_handle_webhook(body)
+
+    # restored before the webhook is registered, so a result arriving while
+    # the saved one loads cannot be overwritten by it
+    await coordinator.async_restore()
 
     _LOGGER.debug("Registering webhook with id %s", cfg.webhook_id)
     webhook.async_register(
@@ -120,10 +193,34 @@ async def async_setup_entry(
         cfg.webhook_id,
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    delay = 0.0
+    if hass.state is not CoreState.running:
+        entry_ids = [e.entry_id for e in hass.config_entries.async_entries(DOMAIN)]
+        delay = entry_ids.index(entry.entry_id) * STARTUP_STAGGER.total_seconds()
+    entry.async_create_background_task(
+        hass,
+        coordinator.async_delayed_refresh(delay),
+        f"{DOMAIN} first scrape {coordinator.job_id}",
+    )
+
+    # completed hours of prices go to the recorder in batches, and the rest
+    # when Home Assistant stops
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, coordinator.statistics.async_flush, STATISTICS_FLUSH_INTERVAL
+        )
+    )
+
+    @callback
+    def _flush_statistics(_event: Event) -> None:
+        coordinator.statistics.async_flush(final=True)
 
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _flush_statistics)
+    )
     entry.async_on_unload(entry.add_update_listener(async_update_options))
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    coordinator.metrics.observe(METRIC_SETUP, time.perf_counter() - start)
     return True
 
 
@@ -140,6 +237,10 @@ async def async_unload_entry(
     data = hass.data[DOMAIN].pop(entry.entry_id, None)
     _LOGGER.info("Unloading entry %s", entry.entry_id)
     if data:
+        coordinator = data["coordinator"]
+        coordinator.async_cancel_publish()
+        coordinator.statistics.async_flush(final=True)
+        coordinator.index.remove(coordinator.job_id)
         webhook_id = entry.data.get("webhook_id")
         if webhook_id:
             try:
@@ -153,3 +254,13 @@ async def async_unload_entry(
     # Unload platforms (like sensors)
     await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     return True
+
+
+async def async_remove_entry(
+    hass: HomeAssistant,
+    entry: ScraperConfigEntry,
+) -> None:
+    """Remove the saved result of a deleted config entry."""
+    await ScraperDataUpdateCoordinator.async_remove_saved_result(
+        hass, _build_config(entry).job_id()
+    )
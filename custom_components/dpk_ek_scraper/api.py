@@ -5,14 +5,31 @@ from __future__ import annotations
 import json
 import logging
 import socket
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any
 
 import aiohttp
-import async_timeout
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
 
 from custom_components.dpk_ek_scraper.api_models import FlightSearchResult
+from custom_components.dpk_ek_scraper.compression import (
+    CHUNK_SIZE,
+    accept_encoding,
+    async_read_body,
+    maybe_compress,
+)
+from custom_components.dpk_ek_scraper.const import (
+    DEFAULT_TIMEOUTS,
+    OP_FETCH,
+    OP_HEALTH,
+    OP_TRIGGER,
+)
+from custom_components.dpk_ek_scraper.metrics import Metrics
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from custom_components.dpk_ek_scraper.config import ScraperConfig
 
 _LOGGER = logging.getLogger(__name__)
@@ -28,6 +45,19 @@ class ScraperCommunicationError(
     """Exception to indicate a communication error."""
 
 
+class ScraperTimeoutError(
+    ScraperCommunicationError,
+):
+    """Exception to indicate that an API call ran out of one of its budgets."""
+
+    def __init__(self, operation: str, phase: str, budget: float) -> None:
+        """Name the operation, the phase that timed out and its budget."""
+        super().__init__(f"{operation} timed out after {budget:g}s waiting for {phase}")
+        self.operation = operation
+        self.phase = phase
+        self.budget = budget
+
+
 class ScraperAuthenticationError(
     ScraperError,
 ):
@@ -52,6 +82,40 @@ class ScraperCalculationStartupError(
     """Exception to indicate a calculation error - probably due to start-up ."""
 
 
+@dataclass(frozen=True)
+class CallTimeouts:
+    """
+    Time budgets, in seconds, for one kind of API call.
+
+    Attributes:
+        connect : float
+            To establish the connection (including waiting for a pool slot).
+        first_byte : float
+            To wait for the response to start, and for each later read.
+        total : float
+            For the whole call, until the response body has been read.
+
+    """
+
+    connect: float
+    first_byte: float
+    total: float
+
+    def client_timeout(self) -> aiohttp.ClientTimeout:
+        """Return the equivalent aiohttp timeout."""
+        return aiohttp.ClientTimeout(
+            total=self.total, sock_connect=self.connect, sock_read=self.first_byte
+        )
+
+    def phase_of(self, exception: TimeoutError) -> tuple[str, float]:
+        """Return which budget ran out to raise exception, and its value."""
+        if isinstance(exception, aiohttp.ConnectionTimeoutError):
+            return "connect", self.connect
+        if isinstance(exception, aiohttp.SocketTimeoutError):
+            return "first_byte", self.first_byte
+        return "total", self.total
+
+
 def _verify_response_or_raise(response: aiohttp.ClientResponse) -> None:
     """Verify that the response is valid."""
     if response.status in (401, 403):
@@ -62,6 +126,38 @@ def _verify_response_or_raise(response: aiohttp.ClientResponse) -> None:
     response.raise_for_status()
 
 
+async def async_check_scraper(
+    session: aiohttp.ClientSession,
+    scraper_url: str,
+    timeouts: CallTimeouts | None = None,
+) -> None:
+    """
+    Check that a scraper answers HTTP requests at scraper_url.
+
+    Needs no job, so a URL can be checked before it is saved. Any HTTP
+    response counts.
+
+    Raises:
+        ScraperCommunicationError: If the host is unreachable, or
+        ScraperTimeoutError if it does not answer within timeouts.
+
+    """
+    timeouts = timeouts or CallTimeouts(*DEFAULT_TIMEOUTS[OP_HEALTH])
+    try:
+        async with session.get(
+            f"{scraper_url.rstrip('/')}/", timeout=timeouts.client_timeout()
+        ):
+            pass
+    except TimeoutError as exception:
+        phase, budget = timeouts.phase_of(exception)
+        raise ScraperTimeoutError(OP_HEALTH, phase, budget) from exception
+    except (aiohttp.ClientError, socket.gaierror) as exception:
+        msg = f"Error fetching information - {exception}"
+        raise ScraperCommunicationError(
+            msg,
+        ) from exception
+
+
 class ScraperApiClient:
     """API Client."""
 
@@ -69,23 +165,61 @@ class ScraperApiClient:
         self,
         config: ScraperConfig,
         session: aiohttp.ClientSession,
+        timeouts: Mapping[str, CallTimeouts] | None = None,
     ) -> None:
-        """Sample API Client."""
+        """
+        Sample API Client.
+
+        Timeouts override the DEFAULT_TIMEOUTS of the operations they name
+        (OP_TRIGGER, OP_FETCH or OP_HEALTH).
+        """
         self.config = config
         self._session = session
-        self._base_url = "http://jupiter:1880"
+        self._base_url = config.scraper_url.rstrip("/")
+        self.timeouts = {
+            operation: CallTimeouts(*budgets)
+            for operation, budgets in DEFAULT_TIMEOUTS.items()
+        } | dict(timeouts or {})
+        # timeouts are counted per operation and phase
+        self.metrics = Metrics()
 
-    async def trigger_scrape(self, webhook_url: str) -> str:
-        """Tell Node-RED to start a scrape for this job_id."""
+    async def trigger_scrape(
+        self,
+        webhook_url: str,
+        version: str | None = None,
+        hashes: dict[str, dict[str, str]] | None = None,
+    ) -> str:
+        """
+        Tell Node-RED to start a scrape for this job_id.
+
+        When the version and per-section item hashes of the result we already
+        hold are passed, they are advertised so the scraper can reply with a
+        delta document instead of a full snapshot, or, if the search page has
+        not changed, with just {"job_id", "unchanged": version}.
+        """
         url = f"{self._base_url}/ek-scraper-schedule"
-        payload = {
+        payload: dict[str, Any] = {
             "job_id": self.config.job_id(),
             "max_legs": self.config.max_legs,
             "max_duration": self.config.max_duration,
             "webhook_url": webhook_url,
         }
+        if self.config.local_combine:
+            # round trips are built from the one-way lists on our side
+            payload["combined"] = False
+        if version:
+            payload["version"] = version
+            payload["accept_unchanged"] = True
+            payload["hashes"] = hashes or {}
+            if self.config.local_combine:
+                payload["hashes"] = {
+                    section: digests
+                    for section, digests in payload["hashes"].items()
+                    if section != "combined"
+                }
         _LOGGER.debug("url=%s, post=%s", url, json.dumps(payload))
         ret = await self._api_wrapper_new(
+            operation=OP_TRIGGER,
             method="post",
             url=url,
             data=payload,
@@ -104,13 +238,41 @@ class ScraperApiClient:
         )
         _LOGGER.debug("uri=%s", uri)
         return await self._api_wrapper(
+            operation=OP_FETCH,
             method="get",
-            url=f"http://jupiter:1880/ek-scraper?{uri}",
-            headers={"Content-type": "application/json; charset=UTF-8"},
+            url=f"{self._base_url}/ek-scraper?{uri}",
+            headers={
+                "Content-type": "application/json; charset=UTF-8",
+                "Accept-Encoding": accept_encoding(),
+            },
         )
 
+    async def async_health_check(self) -> None:
+        """
+        Check that the scraper answers HTTP requests, within seconds.
+
+        Any HTTP response counts: only an unreachable or unresponsive host
+        raises ScraperCommunicationError.
+        """
+        try:
+            await async_check_scraper(
+                self._session, self._base_url, self.timeouts[OP_HEALTH]
+            )
+        except ScraperTimeoutError as exception:
+            self.metrics.incr(f"timeout_{OP_HEALTH}_{exception.phase}")
+            raise
+
+    def _timeout_error(
+        self, operation: str, exception: TimeoutError
+    ) -> ScraperTimeoutError:
+        """Count a timed out call and build the error reporting it."""
+        phase, budget = self.timeouts[operation].phase_of(exception)
+        self.metrics.incr(f"timeout_{operation}_{phase}")
+        return ScraperTimeoutError(operation, phase, budget)
+
     async def _api_wrapper(
         self,
+        operation: str,
         method: str,
         url: str,
         data: dict | None = None,
@@ -118,15 +280,17 @@ class ScraperApiClient:
     ) -> Any:
         """Get information from the API."""
         try:
-            async with async_timeout.timeout(180):
-                response = await self._session.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    json=data,
-                )
+            async with self._session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                json=data,
+                timeout=self.timeouts[operation].client_timeout(),
+            ) as response:
                 _verify_response_or_raise(response)
-                raw = await response.json()
+                raw = json_loads(
+                    await async_read_body(response.content.iter_chunked(CHUNK_SIZE))
+                )
                 flights = FlightSearchResult.from_dict(raw)
                 _LOGGER.debug(
                     "Fetched %d flights, returns %d",
@@ -136,10 +300,7 @@ class ScraperApiClient:
                 return flights
 
         except TimeoutError as exception:
-            msg = f"Timeout error fetching information - {exception}"
-            raise ScraperCommunicationError(
-                msg,
-            ) from exception
+            raise self._timeout_error(operation, exception) from exception
         except (aiohttp.ClientError, socket.gaierror) as exception:
             msg = f"Error fetching information - {exception}"
             raise ScraperCommunicationError(
@@ -153,28 +314,28 @@ class ScraperApiClient:
 
     async def _api_wrapper_new(
         self,
+        operation: str,
         method: str,
         url: str,
         data: dict | None = None,
         headers: dict | None = None,
     ) -> str:
-        """Get information from the API."""
+        """Get information from the API, gzipping large request bodies."""
+        headers = dict(headers or {})
+        body = maybe_compress(json_bytes(data), headers) if data is not None else None
         try:
-            async with async_timeout.timeout(180):
-                response = await self._session.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    json=data,
-                )
+            async with self._session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                data=body,
+                timeout=self.timeouts[operation].client_timeout(),
+            ) as response:
                 _verify_response_or_raise(response)
                 return await response.text()
 
         except TimeoutError as exception:
-            msg = f"Timeout error fetching information - {exception}"
-            raise ScraperCommunicationError(
-                msg,
-            ) from exception
+            raise self._timeout_error(operation, exception) from exception
         except (aiohttp.ClientError, socket.gaierror) as exception:
             msg = f"Error fetching information - {exception}"
             raise ScraperCommunicationError(
@@ -3,21 +3,189 @@ Data models for representing flight search results and related entities.
 
 This module defines dataclasses for LocationInfo, Duration, Price, Leg, Flight,
 and FlightSearchResult, along with methods for deserializing these objects from
-dictionaries.
+dictionaries. Airports, routes, flight numbers and legs are stored as ids into
+the shared CATALOG and read back through properties. Times are kept as sent for
+display, and parsed once into aware datetimes and integer epoch keys for
+filtering and sorting.
 """
 
+import hashlib
+from array import array
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, NamedTuple
 
+import orjson
 
-@dataclass
+from .catalog import CATALOG, Leg
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Sections of a result document that carry itineraries keyed by id
+SECTIONS = ("outbound", "return", "combined")
+
+
+# Why a webhook payload was rejected; each has its own counter in the metrics
+REASON_JSON = "json"
+REASON_ENVELOPE = "envelope"
+REASON_FOREIGN = "foreign"
+REASON_MODEL = "model"
+
+
+class DeltaMismatchError(ValueError):
+    """Raised when a delta document does not apply to the current result."""
+
+
+class PayloadError(ValueError):
+    """Raised when a payload cannot be turned into a result."""
+
+    def __init__(self, reason: str, path: str, message: str) -> None:
+        """Record the reason and the path of the offending field."""
+        super().__init__(f"{path}: {message}")
+        self.reason = reason
+        self.path = path
+
+
+def _describe(err: Exception) -> str:
+    """Describe a model construction error in a few words."""
+    if isinstance(err, KeyError):
+        return f"missing {err.args[0]!r}"
+    return str(err) or type(err).__name__
+
+
+def _parse_items(
+    path: str, items: list[dict[str, Any]], parse: "Callable[[Any], Any]"
+) -> list[Any]:
+    """
+    Parse a list of items, reporting the position of the first bad one.
+
+    Raises:
+        PayloadError: If an item lacks a key or has a value of the wrong type.
+
+    """
+    try:
+        return [parse(item) for item in items]
+    except (AttributeError, KeyError, TypeError, ValueError) as err:
+        # find the item again; only failures pay for this
+        for position, item in enumerate(items):
+            try:
+                parse(item)
+            except (AttributeError, KeyError, TypeError, ValueError) as item_err:
+                raise PayloadError(
+                    REASON_MODEL, f"{path}[{position}]", _describe(item_err)
+                ) from err
+        raise PayloadError(REASON_MODEL, path, _describe(err)) from err
+
+
+def item_hash(data: dict[str, Any]) -> str:
+    """
+    Fingerprint a single itinerary exactly as it was sent by the scraper.
+
+    The hash is the first 16 hex digits of the SHA-1 of the item's canonical
+    JSON (sorted keys, no whitespace, UTF-8), so the scraper can compute the
+    same value. orjson produces it several times faster than the json module,
+    which matters since every item of a full snapshot is hashed.
+
+    Args:
+        data (dict[str, Any]): The raw itinerary dictionary.
+
+    Returns:
+        str: A 16 character hex digest.
+
+    """
+    raw = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha1(raw, usedforsecurity=False).hexdigest()[:16]
+
+
+# Epoch key of a time that could not be parsed; it sorts after every real time
+TIME_UNKNOWN = 2**63 - 1
+
+
+class ParsedTime(NamedTuple):
+    """A timestamp as an aware datetime and as epoch seconds."""
+
+    at: datetime | None
+    key: int
+
+
+@lru_cache(maxsize=8192)
+def parse_time(value: str) -> ParsedTime:
+    """
+    Parse an ISO timestamp once, sharing the result between itineraries.
+
+    The same departure and arrival times recur across the combinations of a
+    result, so parses are cached. Timestamps without an offset are taken as
+    UTC, which keeps their wall clock time and makes every key comparable.
+
+    Args:
+        value (str): The timestamp as sent by the scraper.
+
+    Returns:
+        ParsedTime: The datetime and epoch key, or None and TIME_UNKNOWN if
+        value is not an ISO timestamp.
+
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return ParsedTime(None, TIME_UNKNOWN)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return ParsedTime(parsed, int(parsed.timestamp()))
+
+
+def minutes_of_day(at: datetime | None) -> int:
+    """Return the wall clock time of at in minutes after midnight, or -1."""
+    if at is None:
+        return -1
+    return at.hour * 60 + at.minute
+
+
+def _fold(version: int, hashes: Any) -> int:
+    """XOR item hashes into a version so it can be updated per item."""
+    for value in hashes:
+        version ^= int(value, 16)
+    return version
+
+
+@dataclass(slots=True)
 class AirportInfo:
-    """Represents a flight segment with departure, airport, and arrival."""
+    """
+    Represents a flight segment with departure, airport, and arrival.
+
+    The depart and arrive strings are kept for display; depart_key and
+    arrive_key are parsed from them on construction. The datetimes are only
+    looked up (in the parse cache) when asked for, so each segment holds two
+    shared ints rather than two more references per itinerary.
+    """
 
     depart: str
-    airport: str
+    route_id: int
     arrive: str
+    depart_key: int = field(init=False, repr=False, compare=False)
+    arrive_key: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Parse the departure and arrival times."""
+        self.depart_key = parse_time(self.depart).key
+        self.arrive_key = parse_time(self.arrive).key
+
+    @property
+    def depart_at(self) -> datetime | None:
+        """The departure time as an aware datetime, or None if unparsable."""
+        return parse_time(self.depart).at
+
+    @property
+    def arrive_at(self) -> datetime | None:
+        """The arrival time as an aware datetime, or None if unparsable."""
+        return parse_time(self.arrive).at
+
+    @property
+    def airport(self) -> str:
+        """The route flown, such as 'LHR-BKK'."""
+        return CATALOG.route(self.route_id)
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> "AirportInfo":
@@ -34,9 +202,15 @@ class AirportInfo:
 
         """
         return AirportInfo(
-            depart=data["depart"], airport=data["airport"], arrive=data["arrive"]
+            depart=data["depart"],
+            route_id=CATALOG.route_id(data["airport"]),
+            arrive=data["arrive"],
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert AirportInfo back to a serializable dict."""
+        return {"depart": self.depart, "airport": self.airport, "arrive": self.arrive}
+
 
 @dataclass
 class LocationInfoReturn:
@@ -64,14 +238,38 @@ class LocationInfoReturn:
             return_=AirportInfo.from_dict(schedule["return"]),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert LocationInfoReturn back to a serializable dict."""
+        return {"outbound": self.outbound.to_dict(), "return": self.return_.to_dict()}
 
-@dataclass
+
+@dataclass(slots=True)
 class LocationInfo:
     """Represents a departure or arrival point in a flight."""
 
     time: str
-    airport: str
-    airport_name: str
+    airport_id: int
+    # parsed from time on construction
+    key: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Parse the time."""
+        self.key = parse_time(self.time).key
+
+    @property
+    def at(self) -> datetime | None:
+        """The time as an aware datetime, or None if unparsable."""
+        return parse_time(self.time).at
+
+    @property
+    def airport(self) -> str:
+        """The airport code."""
+        return CATALOG.airport(self.airport_id).code
+
+    @property
+    def airport_name(self) -> str:
+        """The airport name."""
+        return CATALOG.airport(self.airport_id).name
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> "LocationInfo":
@@ -89,10 +287,17 @@ class LocationInfo:
         """
         return LocationInfo(
             time=data["time"],
-            airport=data["airport"],
-            airport_name=data["airport_name"],
+            airport_id=CATALOG.airport_id(data["airport"], data["airport_name"]),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert LocationInfo back to a serializable dict."""
+        return {
+            "time": self.time,
+            "airport": self.airport,
+            "airport_name": self.airport_name,
+        }
+
 
 @dataclass
 class Duration:
@@ -122,6 +327,10 @@ class Duration:
             hours=float(data["hours"]),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert Duration back to a serializable dict."""
+        return {"length": self.length, "hours": self.hours}
+
 
 @dataclass
 class DurationReturn:
@@ -159,6 +368,10 @@ class DurationReturn:
             total=float(data["total"]),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert DurationReturn back to a serializable dict."""
+        return {"outbound": self.outbound, "return": self.return_, "total": self.total}
+
 
 @dataclass
 class Price:
@@ -191,6 +404,10 @@ class Price:
             amount=float(data["amount"]),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert Price back to a serializable dict."""
+        return {"currency": self.currency, "amount": self.amount}
+
 
 @dataclass
 class PriceReturn:
@@ -231,38 +448,14 @@ class PriceReturn:
             currency=data["currency"],
         )
 
-
-@dataclass
-class Leg:
-    """
-    Represents a segment (leg) of a flight.
-
-    Attributes:
-        flight_number (str): The flight number for this leg.
-        aircraft (str): The aircraft type or model used for this leg.
-
-    """
-
-    flight_number: str
-    aircraft: str
-
-    @staticmethod
-    def from_dict(data: dict[str, Any]) -> "Leg":
-        """
-        Create a Leg instance from a dictionary.
-
-        Args:
-            data (dict[str, Any]): A dictionary containing keys 'flight_number'
-            and 'aircraft'.
-
-        Returns:
-            Leg: An instance of Leg populated with the provided data.
-
-        """
-        return Leg(
-            flight_number=data["flight_number"],
-            aircraft=data["aircraft"],
-        )
+    def to_dict(self) -> dict[str, Any]:
+        """Convert PriceReturn back to a serializable dict."""
+        return {
+            "outbound": self.outbound,
+            "return": self.return_,
+            "total": self.total,
+            "currency": self.currency,
+        }
 
 
 @dataclass
@@ -279,7 +472,7 @@ class Flight:
         arrival (LocationInfo): Arrival location information.
         duration (Duration): Duration of the flight.
         price (Price): Price information for the flight.
-        legs (list[Leg]): List of flight segments (legs).
+        leg_ids (tuple[int, ...]): Catalog ids of the flight segments (legs).
 
     """
 
@@ -288,7 +481,12 @@ class Flight:
     arrival: LocationInfo
     duration: Duration
     price: Price
-    legs: list[Leg]
+    leg_ids: tuple[int, ...]
+
+    @property
+    def legs(self) -> list[Leg]:
+        """The flight segments (legs)."""
+        return [CATALOG.leg(leg_id) for leg_id in self.leg_ids]
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> "Flight":
@@ -308,7 +506,12 @@ class Flight:
             arrival=LocationInfo.from_dict(data["arrival"]),
             duration=Duration.from_dict(data["duration"]),
             price=Price.from_dict(data["price"]),
-            legs=[Leg.from_dict(leg) for leg in data["legs"]],
+            leg_ids=tuple(
+                [
+                    CATALOG.leg_id(leg["flight_number"], leg["aircraft"])
+                    for leg in data["legs"]
+                ]
+            ),
         )
 
     @staticmethod
@@ -316,6 +519,17 @@ class Flight:
         """Convert a list of dicts into a list of Flight objects."""
         return [Flight.from_dict(item) for item in data]
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert Flight back to a serializable dict."""
+        return {
+            "id": self.id,
+            "departure": self.departure.to_dict(),
+            "arrival": self.arrival.to_dict(),
+            "duration": self.duration.to_dict(),
+            "price": self.price.to_dict(),
+            "legs": [leg.to_dict() for leg in self.legs],
+        }
+
 
 @dataclass
 class ReturnFlight:
@@ -327,8 +541,10 @@ class ReturnFlight:
         schedule (LocationInfoReturn): Outbound and return schedule information.
         duration (DurationReturn): Duration details for outbound and return flights.
         price (PriceReturn): Price details for outbound and return flights.
-        outbound_legs (list[str]): List of outbound flight leg identifiers.
-        return_legs (list[str]): List of return flight leg identifiers.
+        outbound_leg_ids (tuple[int, ...]): Catalog ids of the outbound flight
+            numbers.
+        return_leg_ids (tuple[int, ...]): Catalog ids of the return flight
+            numbers.
 
     """
 
@@ -336,8 +552,18 @@ class ReturnFlight:
     schedule: LocationInfoReturn
     duration: DurationReturn
     price: PriceReturn
-    outbound_legs: list[str]
-    return_legs: list[str]
+    outbound_leg_ids: tuple[int, ...]
+    return_leg_ids: tuple[int, ...]
+
+    @property
+    def outbound_legs(self) -> list[str]:
+        """The outbound flight numbers."""
+        return [CATALOG.flight_number(leg_id) for leg_id in self.outbound_leg_ids]
+
+    @property
+    def return_legs(self) -> list[str]:
+        """The return flight numbers."""
+        return [CATALOG.flight_number(leg_id) for leg_id in self.return_leg_ids]
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> "ReturnFlight":
@@ -358,8 +584,10 @@ class ReturnFlight:
             schedule=LocationInfoReturn.from_dict(data["schedule"]),
             duration=DurationReturn.from_dict(data["duration"]),
             price=PriceReturn.from_dict(data["price"]),
-            outbound_legs=data["legs"]["outbound"],
-            return_legs=data["legs"]["return"],
+            outbound_leg_ids=tuple(
+                map(CATALOG.flight_number_id, data["legs"]["outbound"])
+            ),
+            return_leg_ids=tuple(map(CATALOG.flight_number_id, data["legs"]["return"])),
         )
 
     @staticmethod
@@ -377,6 +605,16 @@ class ReturnFlight:
         """
         return [ReturnFlight.from_dict(item) for item in data]
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert ReturnFlight back to a serializable dict."""
+        return {
+            "id": self.id,
+            "schedule": self.schedule.to_dict(),
+            "duration": self.duration.to_dict(),
+            "price": self.price.to_dict(),
+            "legs": {"outbound": self.outbound_legs, "return": self.return_legs},
+        }
+
 
 @dataclass
 class TrackerStep:
@@ -404,6 +642,14 @@ class TrackerStep:
         }
 
 
+# how the itineraries of each section of a document are built
+_SECTION_PARSERS: "dict[str, Callable[[Any], Any]]" = {
+    "outbound": Flight.from_dict,
+    "return": Flight.from_dict,
+    "combined": ReturnFlight.from_dict,
+}
+
+
 @dataclass
 class FlightSearchResult:
     """
@@ -413,6 +659,9 @@ class FlightSearchResult:
         outbound (list[Flight]): List of outbound flights.
         return_ (list[Flight]): List of return flights ("return" is a reserved
         word, so use return_).
+        hashes (dict[str, dict[str, str]]): Per section mapping of itinerary id
+        to its item_hash, used to negotiate deltas with the scraper.
+        version (str): XOR of all item hashes; identifies the result content.
 
     """
 
@@ -422,12 +671,18 @@ class FlightSearchResult:
     return_: list[Flight] = field(default_factory=list)
     return_flights: list[ReturnFlight] = field(default_factory=list)
     tracker: list[TrackerStep] = field(default_factory=list)
+    hashes: dict[str, dict[str, str]] = field(default_factory=dict, repr=False)
+    version: str = ""
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "FlightSearchResult":
         """
         Create a FlightSearchResult instance from a dictionary.
 
+        The item hashes and version are always computed from the items, even
+        if the document carries its own: a scraper echoing the trigger's
+        'hashes' and 'version' must not pass off new items as the old ones.
+
         Args:
             data (dict[str, Any]): A dictionary containing keys 'outbound' and 'return',
             each mapping to a list of flight dictionaries.
@@ -437,15 +692,185 @@ class FlightSearchResult:
             the provided data.
 
         """
+        sections: dict[str, list[Any]] = {}
+        hashes: dict[str, dict[str, str]] = {}
+        for section, parse in _SECTION_PARSERS.items():
+            items = data.get(section, [])
+            # parsed first, so a bad item is reported by its path rather than
+            # failing the hashing; items that parse can also be hashed
+            flights = sections[section] = _parse_items(section, items, parse)
+            digests = _parse_items(section, items, item_hash)
+            hashes[section] = {
+                flight.id: digest
+                for flight, digest in zip(flights, digests, strict=True)
+            }
+        version = 0
+        for section in hashes.values():
+            version = _fold(version, section.values())
+        return cls._build(data, sections, hashes, f"{version:016x}")
+
+    @classmethod
+    def from_saved(cls, data: dict[str, Any]) -> "FlightSearchResult":
+        """
+        Rebuild a result saved with to_dict, keeping the scraper's hashes.
+
+        Only for documents we wrote ourselves: re-serialized items need not
+        hash the same as the scraper's originals.
+
+        Raises:
+            ValueError: If the saved version is not a hex string.
+
+        """
+        version = data["version"]
+        if version:
+            int(version, 16)
+        sections = {
+            section: _parse_items(section, data.get(section, []), parse)
+            for section, parse in _SECTION_PARSERS.items()
+        }
+        return cls._build(data, sections, data["hashes"], version)
+
+    @classmethod
+    def _build(
+        cls,
+        data: dict[str, Any],
+        sections: dict[str, list[Any]],
+        hashes: dict[str, dict[str, str]],
+        version: str,
+    ) -> "FlightSearchResult":
+        """Assemble a result from a document's parsed sections."""
         return cls(
             job_id=data.get("job_id", ""),
             result=data.get("result", 0),
-            outbound=[Flight.from_dict(f) for f in data.get("outbound", [])],
-            return_=[Flight.from_dict(f) for f in data.get("return", [])],
-            return_flights=[
-                ReturnFlight.from_dict(f) for f in data.get("combined", [])
-            ],
-            tracker=[TrackerStep.from_dict(f) for f in data.get("tracker", [])],
+            outbound=sections["outbound"],
+            return_=sections["return"],
+            return_flights=sections["combined"],
+            tracker=_parse_items(
+                "tracker", data.get("tracker", []), TrackerStep.from_dict
+            ),
+            hashes=hashes,
+            version=version,
+        )
+
+    def apply_delta(self, data: dict[str, Any]) -> "FlightSearchResult":
+        """
+        Build the next result by applying a delta document to this one.
+
+        The document carries the envelope ('job_id', 'result', 'tracker') plus a
+        'delta' dict with 'base_version' and, per section, optional 'upsert'
+        (full itinerary dicts) and 'delete' (ids) lists. Only upserted items
+        are parsed; unchanged flights are shared with this result.
+
+        Args:
+            data (dict[str, Any]): The delta document.
+
+        Returns:
+            FlightSearchResult: A new result; this instance is left untouched.
+
+        Raises:
+            DeltaMismatchError: If 'base_version' is not this result's version.
+
+        """
+        delta = data["delta"]
+        if delta.get("base_version") != self.version:
+            msg = (
+                f"Delta base {delta.get('base_version')} does not match "
+                f"current version {self.version}"
+            )
+            raise DeltaMismatchError(msg)
+
+        version = int(self.version, 16) if self.version else 0
+        hashes = dict(self.hashes)
+        sections = {
+            "outbound": (self.outbound, Flight.from_dict),
+            "return": (self.return_, Flight.from_dict),
+            "combined": (self.return_flights, ReturnFlight.from_dict),
+        }
+        merged: dict[str, list[Any]] = {}
+        for section, (flights, parse) in sections.items():
+            changes = delta.get(section)
+            if not changes:
+                merged[section] = flights
+                continue
+            old = self.hashes.get(section, {})
+            new = dict(old)
+            deletes = set(changes.get("delete", ()))
+            parsed = {}
+            for item in _parse_items(
+                f"delta/{section}/upsert",
+                changes.get("upsert", []),
+                lambda item, parse=parse: (item, parse(item)),
+            ):
+                raw, flight = item
+                fid = flight.id
+                parsed[fid] = flight
+                deletes.discard(fid)
+                new[fid] = item_hash(raw)
+            for fid in deletes | parsed.keys():
+                if fid in old:
+                    version = _fold(version, (old[fid],))
+            for fid in deletes:
+                new.pop(fid, None)
+            version = _fold(version, (new[fid] for fid in parsed))
+            # keep existing order, replace updated items, then append new ones
+            kept = [parsed.pop(f.id, f) for f in flights if f.id not in deletes]
+            merged[section] = kept + list(parsed.values())
+            hashes[section] = new
+
+        return FlightSearchResult(
+            job_id=data.get("job_id", self.job_id),
+            result=data.get("result", self.result),
+            outbound=merged["outbound"],
+            return_=merged["return"],
+            return_flights=merged["combined"],
+            tracker=_parse_items(
+                "tracker", data.get("tracker", []), TrackerStep.from_dict
+            ),
+            hashes=hashes,
+            version=f"{version:016x}",
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert FlightSearchResult back to a serializable dict.
+
+        The item hashes and version are included, since re-serialized items
+        need not hash the same as the scraper's originals; read it back with
+        from_saved.
+        """
+        return {
+            "job_id": self.job_id,
+            "result": self.result,
+            "outbound": [f.to_dict() for f in self.outbound],
+            "return": [f.to_dict() for f in self.return_],
+            "combined": [f.to_dict() for f in self.return_flights],
+            "tracker": [step.to_dict() for step in self.tracker],
+            "hashes": self.hashes,
+            "version": self.version,
+        }
+
+    def time_keys(self, direction: str = "outbound", event: str = "depart") -> array:
+        """
+        Return one epoch key per itinerary, in the order of return_flights.
+
+        The column is a packed array of 64-bit integers, so it can be compared
+        or sorted as a whole (e.g. wrapped with numpy.frombuffer).
+
+        Args:
+            direction (str): 'outbound' or 'return'.
+            event (str): 'depart' or 'arrive'.
+
+        Returns:
+            array: Epoch seconds, TIME_UNKNOWN where a time did not parse.
+
+        """
+        attr = f"{event}_key"
+        if direction == "outbound":
+            return array(
+                "q", [getattr(f.schedule.outbound, attr) for f in self.return_flights]
+            )
+        return array(
+            "q", [getattr(f.schedule.return_, attr) for f in self.return_flights]
         )
 
     @property
@@ -0,0 +1,155 @@
+"""
+Catalog of the airports, aircraft, flight numbers and legs seen in results.
+
+The same few airports and legs appear in thousands of itineraries, and again
+in every scrape. Parsed models store small integer ids into this catalog
+instead of their own copies, so memory grows with the number of distinct
+entities rather than with the number of itineraries. The catalog is shared by
+every entry and outlives individual results; ids are only meaningful within
+the running process and are never persisted.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+
+@dataclass(frozen=True, slots=True)
+class Airport:
+    """An airport code and its name."""
+
+    code: str
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class Leg:
+    """
+    Represents a segment (leg) of a flight.
+
+    Attributes:
+        flight_number (str): The flight number for this leg.
+        aircraft (str): The aircraft type or model used for this leg.
+
+    """
+
+    flight_number: str
+    aircraft: str
+
+    @staticmethod
+    def from_dict(data: dict[str, str]) -> Leg:
+        """Return the catalog's leg for a dictionary with the Leg keys."""
+        return CATALOG.leg(CATALOG.leg_id(data["flight_number"], data["aircraft"]))
+
+    def to_dict(self) -> dict[str, str]:
+        """Convert Leg back to a serializable dict."""
+        return {"flight_number": self.flight_number, "aircraft": self.aircraft}
+
+
+class _Table[K: Hashable, V]:
+    """Append-only id <-> value table."""
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self.values: list[V] = []
+        self._ids: dict[K, int] = {}
+        self._lock = lock
+        # lookups of known keys are the hot path, so skip a Python-level call
+        self.get: Callable[[K], int | None] = self._ids.get
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, key: K, value: V) -> int:
+        """Return the id of key, adding value under a new id if it is unseen."""
+        # results may be parsed in executor threads for several entries at once
+        with self._lock:
+            found = self._ids.get(key)
+            if found is None:
+                found = self._ids[key] = len(self.values)
+                self.values.append(value)
+            return found
+
+
+class Catalog:
+    """Interned airports, aircraft, flight numbers, routes and legs."""
+
+    def __init__(self) -> None:
+        """Initialise an empty catalog."""
+        lock = threading.Lock()
+        self._airports: _Table[str, Airport] = _Table(lock)
+        self._aircraft: _Table[str, str] = _Table(lock)
+        self._flight_numbers: _Table[str, str] = _Table(lock)
+        self._routes: _Table[str, str] = _Table(lock)
+        self._legs: _Table[tuple[str, str], Leg] = _Table(lock)
+
+    def sizes(self) -> dict[str, int]:
+        """Return the number of entries in each table."""
+        return {
+            "airports": len(self._airports),
+            "aircraft": len(self._aircraft),
+            "flight_numbers": len(self._flight_numbers),
+            "routes": len(self._routes),
+            "legs": len(self._legs),
+        }
+
+    def airport_id(self, code: str, name: str) -> int:
+        """Return the id of an airport; the first name seen for a code is kept."""
+        found = self._airports.get(code)
+        if found is None:
+            found = self._airports.add(code, Airport(code, name))
+        return found
+
+    def airport(self, airport_id: int) -> Airport:
+        """Return the airport with the given id."""
+        return self._airports.values[airport_id]
+
+    def flight_number_id(self, flight_number: str) -> int:
+        """Return the id of a flight number."""
+        found = self._flight_numbers.get(flight_number)
+        if found is None:
+            found = self._flight_numbers.add(flight_number, flight_number)
+        return found
+
+    def flight_number(self, flight_number_id: int) -> str:
+        """Return the flight number with the given id."""
+        return self._flight_numbers.values[flight_number_id]
+
+    def route_id(self, route: str) -> int:
+        """Return the id of a route such as 'LHR-BKK'."""
+        found = self._routes.get(route)
+        if found is None:
+            found = self._routes.add(route, route)
+        return found
+
+    def route(self, route_id: int) -> str:
+        """Return the route with the given id."""
+        return self._routes.values[route_id]
+
+    def leg_id(self, flight_number: str, aircraft: str) -> int:
+        """Return the id of a leg, a flight number flown by an aircraft type."""
+        key = (flight_number, aircraft)
+        found = self._legs.get(key)
+        if found is None:
+            # the leg shares its strings with the other tables
+            aircraft_id = self._aircraft.get(aircraft)
+            if aircraft_id is None:
+                aircraft_id = self._aircraft.add(aircraft, aircraft)
+            leg = Leg(
+                self.flight_number(self.flight_number_id(flight_number)),
+                self._aircraft.values[aircraft_id],
+            )
+            found = self._legs.add(key, leg)
+        return found
+
+    def leg(self, leg_id: int) -> Leg:
+        """Return the leg with the given id."""
+        return self._legs.values[leg_id]
+
+
+# shared by every entry of the integration for the lifetime of the process
+CATALOG = Catalog()
@@ -0,0 +1,214 @@
+"""
+Build round-trip itineraries locally from the one-way outbound/return lists.
+
+The scraper's 'combined' section is roughly the product of the two one-way
+lists and is by far the largest part of a result. When an entry combines
+locally, the one-way flights are first filtered by duration and leg count,
+then pairs are generated cheapest first from both lists sorted by price: a
+heap holds one candidate per outbound flight, so only the pairs that can still
+make the top k are ever looked at. Pairs that leave less than the minimum stay
+between landing and flying home are skipped.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from .api_models import (
+    TIME_UNKNOWN,
+    AirportInfo,
+    DurationReturn,
+    Flight,
+    FlightSearchResult,
+    LocationInfoReturn,
+    PriceReturn,
+    ReturnFlight,
+)
+from .catalog import CATALOG
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+@dataclass(frozen=True)
+class CombineLimits:
+    """
+    Which pairs of one-way flights are combined.
+
+    Attributes:
+        max_duration : float | None
+            Longest one-way duration, in hours.
+        max_legs : int | None
+            Most legs in each direction.
+        min_stay : timedelta
+            Least time between landing and the return departure.
+        top_k : int
+            Number of cheapest combinations kept.
+
+    """
+
+    max_duration: float | None = None
+    max_legs: int | None = None
+    min_stay: timedelta = timedelta(0)
+    top_k: int = 200
+
+    def allows(self, flight: Flight) -> bool:
+        """Tell whether a one-way flight may be part of a combination."""
+        return (
+            self.max_duration is None or flight.duration.hours <= self.max_duration
+        ) and (self.max_legs is None or len(flight.leg_ids) <= self.max_legs)
+
+
+@dataclass(frozen=True, slots=True)
+class _OneWay:
+    """A one-way flight with the values pairing needs, computed once."""
+
+    flight: Flight
+    price: float
+    # epoch keys of the departure and arrival
+    departs: int
+    arrives: int
+    route_id: int
+    flight_number_ids: tuple[int, ...]
+    digest: str
+
+
+def _one_way(flight: Flight, digest: str) -> _OneWay:
+    """Precompute what pairing needs from a one-way flight."""
+    return _OneWay(
+        flight=flight,
+        price=flight.price.amount,
+        departs=flight.departure.key,
+        arrives=flight.arrival.key,
+        route_id=CATALOG.route_id(
+            f"{flight.departure.airport}-{flight.arrival.airport}"
+        ),
+        flight_number_ids=tuple(
+            CATALOG.flight_number_id(CATALOG.leg(leg_id).flight_number)
+            for leg_id in flight.leg_ids
+        ),
+        digest=digest,
+    )
+
+
+def _stay_ok(out: _OneWay, ret: _OneWay, min_stay: float) -> bool:
+    """Tell whether the return leaves at least min_stay seconds after landing."""
+    if TIME_UNKNOWN in (out.arrives, ret.departs):
+        return True
+    return ret.departs - out.arrives >= min_stay
+
+
+def _pair_hash(out_digest: str, ret_digest: str) -> str:
+    """Fingerprint a combination from the hashes of its two flights."""
+    raw = f"{out_digest}:{ret_digest}".encode()
+    return hashlib.sha1(raw, usedforsecurity=False).hexdigest()[:16]
+
+
+def _combination(out: _OneWay, ret: _OneWay) -> ReturnFlight:
+    """Build the round-trip itinerary of two one-way flights."""
+    outbound, return_ = out.flight, ret.flight
+    return ReturnFlight(
+        id=f"{outbound.id}_{return_.id}",
+        schedule=LocationInfoReturn(
+            outbound=AirportInfo(
+                depart=outbound.departure.time,
+                route_id=out.route_id,
+                arrive=outbound.arrival.time,
+            ),
+            return_=AirportInfo(
+                depart=return_.departure.time,
+                route_id=ret.route_id,
+                arrive=return_.arrival.time,
+            ),
+        ),
+        duration=DurationReturn(
+            outbound=outbound.duration.hours,
+            return_=return_.duration.hours,
+            total=round(outbound.duration.hours + return_.duration.hours, 2),
+        ),
+        price=PriceReturn(
+            outbound=out.price,
+            return_=ret.price,
+            total=round(out.price + ret.price, 2),
+            currency=outbound.price.currency,
+        ),
+        outbound_leg_ids=out.flight_number_ids,
+        return_leg_ids=ret.flight_number_ids,
+    )
+
+
+def combine(
+    outbound: Sequence[Flight],
+    return_: Sequence[Flight],
+    limits: CombineLimits,
+    hashes: dict[str, dict[str, str]] | None = None,
+) -> tuple[list[ReturnFlight], dict[str, str]]:
+    """
+    Return the top_k cheapest valid combinations, cheapest first.
+
+    Args:
+        outbound (Sequence[Flight]): One-way outbound flights.
+        return_ (Sequence[Flight]): One-way return flights.
+        limits (CombineLimits): Filters and the number of combinations kept.
+        hashes (dict[str, dict[str, str]] | None): The result's item hashes;
+            a combination's hash is derived from those of its flights.
+
+    Returns:
+        tuple[list[ReturnFlight], dict[str, str]]: The combinations and their
+        hashes by id.
+
+    """
+    hashes = hashes or {}
+    out_hashes = hashes.get("outbound", {})
+    ret_hashes = hashes.get("return", {})
+    outs = sorted(
+        (_one_way(f, out_hashes.get(f.id, "")) for f in outbound if limits.allows(f)),
+        key=lambda one_way: one_way.price,
+    )
+    rets = sorted(
+        (_one_way(f, ret_hashes.get(f.id, "")) for f in return_ if limits.allows(f)),
+        key=lambda one_way: one_way.price,
+    )
+    if not outs or not rets or limits.top_k <= 0:
+        return [], {}
+
+    # one candidate per outbound flight: its cheapest return not yet paired
+    heap = [(out.price + rets[0].price, i, 0) for i, out in enumerate(outs)]
+    heapq.heapify(heap)
+    min_stay = limits.min_stay.total_seconds()
+    combined: list[ReturnFlight] = []
+    combined_hashes: dict[str, str] = {}
+    while heap and len(combined) < limits.top_k:
+        _, i, j = heapq.heappop(heap)
+        out, ret = outs[i], rets[j]
+        if j + 1 < len(rets):
+            heapq.heappush(heap, (out.price + rets[j + 1].price, i, j + 1))
+        if not _stay_ok(out, ret, min_stay):
+            continue
+        flight = _combination(out, ret)
+        combined.append(flight)
+        combined_hashes[flight.id] = _pair_hash(out.digest, ret.digest)
+    return combined, combined_hashes
+
+
+def combine_result(
+    result: FlightSearchResult, limits: CombineLimits
+) -> FlightSearchResult:
+    """
+    Return result with its combined section rebuilt from the one-way lists.
+
+    The version is left as it is: it identifies what the scraper sent, which
+    is what deltas are negotiated against.
+    """
+    combined, combined_hashes = combine(
+        result.outbound, result.return_, limits, result.hashes
+    )
+    return replace(
+        result,
+        return_flights=combined,
+        hashes={**result.hashes, "combined": combined_hashes},
+    )
@@ -0,0 +1,259 @@
+"""
+Content-Encoding support for bodies exchanged with the scraper.
+
+Bodies are decompressed chunk by chunk as they are read, so a compressed
+payload is never held in memory alongside its decoded form. The encoding is
+detected from the body's magic bytes rather than trusted from the header,
+because aiohttp may already have decoded gzip/deflate before we see it. A
+body that does not start like JSON or a known format is taken as raw deflate,
+which some servers send as 'deflate'. The decoded size is capped at
+MAX_BODY_BYTES, so a small compressed body cannot expand into gigabytes of
+memory, and a truncated stream or trailing garbage is rejected rather than
+parsed as a shorter body.
+"""
+
+from __future__ import annotations
+
+import gzip
+import zlib
+from typing import TYPE_CHECKING, Any, Protocol
+
+from .api_models import REASON_JSON, PayloadError
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional
+    zstandard = None
+
+# what a corrupt compressed body raises
+_DECODE_ERRORS: tuple[type[Exception], ...] = (
+    (zlib.error, zstandard.ZstdError) if zstandard is not None else (zlib.error,)
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable
+
+CHUNK_SIZE = 64 * 1024
+# Request bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 4096
+# Decoded bodies larger than this are rejected (about 100k itineraries)
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# zstd input is fed in slices this small, since its decompressor has no output
+# limit and one block of a few bytes can expand to 128 KiB
+_ZSTD_SLICE = 256
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# wbits that let zlib auto-detect a gzip or zlib header, and for raw deflate
+_ZLIB_AUTO_WBITS = 32 + zlib.MAX_WBITS
+_ZLIB_RAW_WBITS = -zlib.MAX_WBITS
+# bytes a JSON document (or an empty body's whitespace) can start with
+_JSON_START = frozenset(b' \t\r\n{["-0123456789tfn\xef')
+
+
+class _Decompressor(Protocol):
+    """Incremental decompressor as provided by zlib and zstandard."""
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        """Decompress a chunk, returning at most about max_length bytes."""
+
+    def flush(self) -> bytes:
+        """Return any remaining output."""
+
+
+class _Identity:
+    """Pass-through decompressor for plain bodies."""
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:  # noqa: ARG002
+        """Return the chunk unchanged."""
+        return data
+
+    def flush(self) -> bytes:
+        """Nothing is buffered."""
+        return b""
+
+
+class _Zstd:
+    """zstd decompressor that stops once max_length bytes have been produced."""
+
+    def __init__(self) -> None:
+        """Start a new stream."""
+        self._decoder = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        """Decompress a chunk slice by slice, up to max_length bytes."""
+        out = bytearray()
+        view = memoryview(data)
+        for start in range(0, len(view), _ZSTD_SLICE):
+            out += self._decoder.decompress(view[start : start + _ZSTD_SLICE])
+            if len(out) > max_length:
+                break
+        return bytes(out)
+
+    def flush(self) -> bytes:
+        """Return any remaining output."""
+        return self._decoder.flush()
+
+
+class _Zlib:
+    """
+    gzip, zlib or raw deflate decompressor that checks the stream is whole.
+
+    Concatenated gzip members are decoded one after the other, as gzip does;
+    anything else after the end of the stream is an error.
+    """
+
+    def __init__(self, wbits: int, *, gzip_members: bool) -> None:
+        """Start a new stream."""
+        self._wbits = wbits
+        self._gzip_members = gzip_members
+        self._decoder = zlib.decompressobj(wbits)
+        # the start of a further member, when a chunk ends inside its magic
+        self._pending = b""
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        """Decompress a chunk, up to max_length bytes."""
+        out = bytearray()
+        data = self._pending + data
+        self._pending = b""
+        while data:
+            decoder = self._decoder
+            if decoder.eof:
+                if self._gzip_members and len(data) < len(_GZIP_MAGIC):
+                    self._pending = data
+                    break
+                if not (self._gzip_members and data.startswith(_GZIP_MAGIC)):
+                    msg = "trailing data after the end of the compressed body"
+                    raise PayloadError(REASON_JSON, "(body)", msg)
+                self._decoder = decoder = zlib.decompressobj(self._wbits)
+            out += decoder.decompress(data, max_length - len(out))
+            if len(out) >= max_length:
+                break
+            # all input is used up, or what follows the end of this stream
+            data = decoder.unused_data
+        return bytes(out)
+
+    def flush(self) -> bytes:
+        """Return any remaining output, checking the stream was complete."""
+        out = self._decoder.flush()
+        if not self._decoder.eof or self._pending:
+            msg = "compressed body is truncated"
+            raise PayloadError(REASON_JSON, "(body)", msg)
+        return out
+
+
+def _is_zlib_header(head: bytes) -> bool:
+    """Check for an RFC 1950 header (what HTTP calls 'deflate')."""
+    return (
+        len(head) >= 2  # noqa: PLR2004
+        and head[0] & 0x0F == zlib.DEFLATED
+        and (head[0] << 8 | head[1]) % 31 == 0
+    )
+
+
+def _decompressor_for(head: bytes) -> _Decompressor:
+    """Pick a decompressor from the first bytes of a body."""
+    if head.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            msg = "zstd body but the zstandard package is not installed"
+            raise PayloadError(REASON_JSON, "(body)", msg)
+        return _Zstd()
+    if head.startswith(_GZIP_MAGIC):
+        return _Zlib(_ZLIB_AUTO_WBITS, gzip_members=True)
+    if _is_zlib_header(head):
+        return _Zlib(_ZLIB_AUTO_WBITS, gzip_members=False)
+    if not head or head[0] in _JSON_START:
+        return _Identity()
+    return _Zlib(_ZLIB_RAW_WBITS, gzip_members=False)
+
+
+def accept_encoding() -> str:
+    """Return the Accept-Encoding value for the encodings we can decode."""
+    return "zstd, gzip, deflate" if zstandard is not None else "gzip, deflate"
+
+
+def _append(body: bytearray, data: bytes, max_size: int) -> None:
+    """Append decoded data to body, refusing to grow it past max_size."""
+    if len(body) + len(data) > max_size:
+        msg = f"decoded body exceeds {max_size} bytes"
+        raise PayloadError(REASON_JSON, "(body)", msg)
+    body += data
+
+
+async def async_read_body(
+    chunks: AsyncIterable[bytes], max_size: int = MAX_BODY_BYTES
+) -> bytearray:
+    """
+    Read a body, decompressing it as it streams in.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The raw body, e.g.
+        ``request.content.iter_chunked(CHUNK_SIZE)``.
+        max_size (int): The largest decoded body accepted.
+
+    Returns:
+        bytearray: The decoded body, ready for the JSON parser.
+
+    Raises:
+        PayloadError: If the body is compressed with an unsupported encoding,
+        is corrupt, truncated or followed by trailing data, or decodes to more
+        than max_size bytes.
+
+    """
+    body = bytearray()
+    decoder: _Decompressor | None = None
+    head = b""
+    try:
+        async for chunk in chunks:
+            if decoder is None:
+                # sniff the encoding once enough bytes have arrived
+                head += chunk
+                if len(head) < len(_ZSTD_MAGIC):
+                    continue
+                decoder = _decompressor_for(head)
+                chunk = head  # noqa: PLW2901
+            # one byte over the limit is enough to tell it was exceeded
+            _append(body, decoder.decompress(chunk, max_size - len(body) + 1), max_size)
+        if decoder is None:
+            decoder = _decompressor_for(head)
+            _append(body, decoder.decompress(head, max_size - len(body) + 1), max_size)
+        _append(body, decoder.flush(), max_size)
+    except _DECODE_ERRORS as err:
+        raise PayloadError(REASON_JSON, "(body)", str(err)) from err
+    return body
+
+
+def compress(data: bytes, encoding: str = "gzip") -> bytes:
+    """
+    Compress a request body.
+
+    Args:
+        data (bytes): The body to compress.
+        encoding (str): 'gzip', 'deflate' or 'zstd'.
+
+    Returns:
+        bytes: The compressed body.
+
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if encoding == "deflate":
+        return zlib.compress(data, 6)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    msg = f"Unsupported content encoding: {encoding}"
+    raise ValueError(msg)
+
+
+def maybe_compress(data: bytes, headers: dict[str, Any]) -> bytes:
+    """
+    Gzip a request body in place of the original if it is large enough.
+
+    Only gzip is used for requests since it is what Node-RED's body parser
+    understands out of the box. The Content-Encoding header is set on
+    ``headers`` when the body is compressed.
+    """
+    if len(data) < COMPRESS_MIN_BYTES:
+        return data
+    headers["Content-Encoding"] = "gzip"
+    return compress(data, "gzip")
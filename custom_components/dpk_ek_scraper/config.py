@@ -8,6 +8,12 @@ scraper.
 import re
 from dataclasses import dataclass
 
+from .const import (
+    DEFAULT_COALESCE_MAX_LATENCY,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_SCRAPER_URL,
+)
+
 
 @dataclass
 class ScraperConfig:
@@ -31,6 +37,26 @@ class ScraperConfig:
             Maximum duration of the trip.
         clas : str
             Travel class (econ, prem, bus or first).
+        scraper_url : str
+            Base URL of the Node-RED scraper.
+        price_deadband : float
+            Price changes up to this amount are not published.
+        group : str
+            Name of the group of entries compared with each other; empty for
+            the default (same destination and class).
+        local_combine : bool
+            Build round trips from the one-way lists instead of receiving
+            the scraper's combined section.
+        min_stay : float
+            Least hours between landing and the return flight, when combining
+            locally.
+        top_k : int
+            Number of cheapest round trips kept when combining locally.
+        coalesce_window : float
+            Seconds to wait for further results before publishing to
+            entities; 0 publishes every result straight away.
+        coalesce_max_latency : float
+            Longest a result is held back while further ones keep arriving.
 
     """
 
@@ -42,6 +68,14 @@ class ScraperConfig:
     max_legs: int | None = None
     max_duration: float | None = None
     webhook_id: str | None = None
+    scraper_url: str = DEFAULT_SCRAPER_URL
+    price_deadband: float = 0.0
+    group: str = ""
+    local_combine: bool = False
+    min_stay: float = 0.0
+    top_k: int = 200
+    coalesce_window: float = DEFAULT_COALESCE_WINDOW
+    coalesce_max_latency: float = DEFAULT_COALESCE_MAX_LATENCY
     # Add other config properties here
 
     def job_id(self) -> str:
@@ -59,6 +93,17 @@ class ScraperConfig:
         )
         return re.sub(r"[^A-Za-z0-9_]", "_", base).lower()
 
+    def group_id(self) -> str:
+        """
+        Return the group this job is compared within.
+
+        Returns:
+            str: The configured group, or destination and class by default.
+
+        """
+        base = self.group or f"{self.destination}-{self.ticket_class}"
+        return re.sub(r"[^A-Za-z0-9_]", "_", base.strip()).lower()
+
     def equals(self, other: "ScraperConfig") -> bool:
         """
         Check if this configuration is equal to another configuration.
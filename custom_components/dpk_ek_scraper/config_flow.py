@@ -16,19 +16,35 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from custom_components.dpk_ek_scraper.api import (
+    ScraperCommunicationError,
+    async_check_scraper,
+)
 from custom_components.dpk_ek_scraper.config import ScraperConfig
 
 from .const import (
     CONF_CLASS,
+    CONF_COALESCE_MAX_LATENCY,
+    CONF_COALESCE_WINDOW,
     CONF_DEPART,
     CONF_DEST,
+    CONF_GROUP,
+    CONF_LOCAL_COMBINE,
     CONF_MAX_DURATION,
     CONF_MAX_LEGS,
+    CONF_MIN_STAY,
     CONF_ORIGIN,
+    CONF_PRICE_DEADBAND,
     CONF_RETURN,
+    CONF_SCRAPER_URL,
+    CONF_TOP_K,
     CONF_WEBHOOK,
     CONFIG_FLOW_VERSION,
+    DEFAULT_COALESCE_MAX_LATENCY,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_SCRAPER_URL,
     DOMAIN,
 )
 
@@ -40,7 +56,14 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 FLIGHT_CLASS_OPTIONS = ["economy", "premium", "business", "first"]
-TODAY = datetime.datetime.now(tz=datetime.UTC).date().isoformat()
+
+
+def _today() -> str:
+    """Return today's date (UTC) in ISO format, evaluated when called."""
+    return datetime.datetime.now(tz=datetime.UTC).date().isoformat()
+
+
+# date defaults are callables, so the form offers the date it is shown on
 OPTIONS = vol.Schema(
     {
         vol.Required(CONF_ORIGIN, default="LON"): str,
@@ -51,8 +74,8 @@ OPTIONS = vol.Schema(
                 mode=selector.SelectSelectorMode.DROPDOWN,
             )
         ),
-        vol.Required(CONF_DEPART, default=TODAY): selector.DateSelector(),
-        vol.Required(CONF_RETURN, default=TODAY): selector.DateSelector(),
+        vol.Required(CONF_DEPART, default=_today): selector.DateSelector(),
+        vol.Required(CONF_RETURN, default=_today): selector.DateSelector(),
         vol.Required(CONF_MAX_LEGS, default=1): selector.NumberSelector(
             selector.NumberSelectorConfig(
                 mode=selector.NumberSelectorMode.BOX,  # up/down arrows
@@ -189,8 +212,23 @@ class MyIntegrationOptionsFlowHandler(config_entries.OptionsFlow):
             ConfigFlowResult: The result of the options flow step.
 
         """
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            # only a new scraper URL is checked, so other options can still
+            # be changed while the scraper is down
+            url = user_input.get(CONF_SCRAPER_URL, DEFAULT_SCRAPER_URL)
+            current = self.config_entry.options.get(
+                CONF_SCRAPER_URL,
+                self.config_entry.data.get(CONF_SCRAPER_URL, DEFAULT_SCRAPER_URL),
+            )
+            if url != current:
+                try:
+                    await async_check_scraper(async_get_clientsession(self.hass), url)
+                except ScraperCommunicationError as err:
+                    _LOGGER.warning("Scraper health check failed: %s", err)
+                    errors[CONF_SCRAPER_URL] = "cannot_connect"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
 
         options_schema = vol.Schema(
             {
@@ -221,7 +259,82 @@ class MyIntegrationOptionsFlowHandler(config_entries.OptionsFlow):
                         step=0.25,
                     )
                 ),
+                vol.Required(
+                    CONF_PRICE_DEADBAND,
+                    default=self.config_entry.options.get(CONF_PRICE_DEADBAND, 0.0),
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        mode=selector.NumberSelectorMode.BOX,
+                        min=0.0,
+                        max=500.0,
+                        step=0.01,
+                    )
+                ),
+                vol.Required(
+                    CONF_SCRAPER_URL,
+                    default=self.config_entry.options.get(
+                        CONF_SCRAPER_URL, DEFAULT_SCRAPER_URL
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_GROUP,
+                    default=self.config_entry.options.get(CONF_GROUP, ""),
+                ): str,
+                vol.Required(
+                    CONF_LOCAL_COMBINE,
+                    default=self.config_entry.options.get(CONF_LOCAL_COMBINE, False),
+                ): selector.BooleanSelector(),
+                vol.Required(
+                    CONF_MIN_STAY,
+                    default=self.config_entry.options.get(CONF_MIN_STAY, 0.0),
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        mode=selector.NumberSelectorMode.BOX,
+                        min=0.0,
+                        max=720.0,
+                        step=0.5,
+                    )
+                ),
+                vol.Required(
+                    CONF_TOP_K,
+                    default=self.config_entry.options.get(CONF_TOP_K, 200),
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        mode=selector.NumberSelectorMode.BOX,
+                        min=1,
+                        max=5000,
+                        step=1,
+                    )
+                ),
+                vol.Required(
+                    CONF_COALESCE_WINDOW,
+                    default=self.config_entry.options.get(
+                        CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW
+                    ),
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        mode=selector.NumberSelectorMode.BOX,
+                        min=0.0,
+                        max=60.0,
+                        step=0.1,
+                    )
+                ),
+                vol.Required(
+                    CONF_COALESCE_MAX_LATENCY,
+                    default=self.config_entry.options.get(
+                        CONF_COALESCE_MAX_LATENCY, DEFAULT_COALESCE_MAX_LATENCY
+                    ),
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        mode=selector.NumberSelectorMode.BOX,
+                        min=0.0,
+                        max=300.0,
+                        step=0.5,
+                    )
+                ),
             }
         )
 
-        return self.async_show_form(step_id="init", data_schema=options_schema)
+        return self.async_show_form(
+            step_id="init", data_schema=options_schema, errors=errors
+        )
@@ -8,10 +8,72 @@ MANUFACTURER = "DPK"
 CONFIG_FLOW_VERSION = 1
 
 DEFAULT_NAME = "EK Scraper"
+DEFAULT_SCRAPER_URL = "http://jupiter:1880"
 UPDATE_INTERVAL = timedelta(minutes=2)
 RAND_MIN_MINUTES = 120
 RAND_MAX_MINUTES = 481
 
+# API operations and their (connect, first byte, total) budgets in seconds.
+# A trigger only waits for Node-RED to acknowledge, a fetch for a full scrape.
+OP_TRIGGER = "trigger"
+OP_FETCH = "fetch"
+OP_HEALTH = "health"
+DEFAULT_TIMEOUTS = {
+    OP_TRIGGER: (5.0, 10.0, 15.0),
+    OP_FETCH: (5.0, 150.0, 180.0),
+    OP_HEALTH: (3.0, 5.0, 5.0),
+}
+
+# While HA starts, each entry's first scrape is delayed by this much more
+STARTUP_STAGGER = timedelta(seconds=10)
+# The last accepted result is saved this many seconds after it changes
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60
+# Completed hours of price statistics are imported this often
+STATISTICS_FLUSH_INTERVAL = timedelta(hours=1)
+# Price trends: EWMA smoothing factor, and days of rolling min/max kept
+TREND_ALPHA = 0.3
+TREND_WINDOW_DAYS = 14
+# Only the most recent tracker steps of a result are kept
+TRACKER_MAX_STEPS = 20
+
+# Webhook bodies at least this size are decoded and parsed in the executor
+PARSE_EXECUTOR_MIN_BYTES = 256 * 1024
+# Warn when an inline parse blocks the event loop for longer than this
+PARSE_BLOCK_WARN_SECONDS = 0.05
+
+# Results arriving within this many seconds of each other are published to
+# entities once; an update is never held back longer than the max latency
+DEFAULT_COALESCE_WINDOW = 1.0
+DEFAULT_COALESCE_MAX_LATENCY = 5.0
+
+# hass.data[DOMAIN] keys for domain-wide state (other keys are entry ids)
+DATA_TIMINGS = "timings"
+DATA_METRICS = "metrics"
+DATA_INDEX = "index"
+
+# Client-side metrics recorded by the integration, with their units
+METRIC_TRIGGER_RTT = "trigger_rtt"
+METRIC_WEBHOOK_READ = "webhook_read"
+METRIC_JSON_DECODE = "json_decode"
+METRIC_RESULT_BUILD = "result_build"
+METRIC_ENTITY_DISCOVERY = "entity_discovery"
+METRIC_UPDATE_FANOUT = "update_fanout"
+METRIC_STATE_WRITES = "state_writes"
+METRIC_LOOP_BLOCK = "loop_block"
+METRIC_ALLOCATED = "allocated_bytes"
+METRIC_SETUP = "setup"
+METRIC_UNITS = {
+    METRIC_TRIGGER_RTT: "s",
+    METRIC_WEBHOOK_READ: "s",
+    METRIC_JSON_DECODE: "s",
+    METRIC_RESULT_BUILD: "s",
+    METRIC_ENTITY_DISCOVERY: "s",
+    METRIC_UPDATE_FANOUT: "s",
+    METRIC_STATE_WRITES: None,
+    METRIC_LOOP_BLOCK: "s",
+}
+
 # ek
 CONF_ORIGIN = "origin"
 CONF_DEST = "destination"
@@ -21,6 +83,14 @@ CONF_MAX_LEGS = "max_legs"
 CONF_MAX_DURATION = "max_duration"
 CONF_CLASS = "class"
 CONF_WEBHOOK = "webhook_id"
+CONF_SCRAPER_URL = "scraper_url"
+CONF_PRICE_DEADBAND = "price_deadband"
+CONF_GROUP = "group"
+CONF_LOCAL_COMBINE = "local_combine"
+CONF_MIN_STAY = "min_stay"
+CONF_TOP_K = "top_k"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_COALESCE_MAX_LATENCY = "coalesce_max_latency"
 
 ATTR_ORIGIN = "origin"
 ATTR_ORIGIN_NAME = "origin_name"
@@ -43,3 +113,39 @@ ATTR_RET_ARRIVE = "return_arrive"
 ATTR_RET_DURATION = "return_duration"
 ATTR_RET_LEGS = "return_legs"
 ATTR_RET_PRICE = "return_price"
+ATTR_FRONTIER = "frontier"
+ATTR_TREND = "trend"
+ATTR_EWMA = "ewma"
+ATTR_ROLLING_MIN = "rolling_min"
+ATTR_ROLLING_MAX = "rolling_max"
+ATTR_CHANGE_PCT = "change_since_first_seen_pct"
+ATTR_DAYS_SINCE_DROP = "days_since_last_drop"
+ATTR_FIRST_SEEN = "first_seen"
+
+SERVICE_SEARCH_FLIGHTS = "search_flights"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_GROUP = "group"
+ATTR_MAX_PRICE = "max_price"
+ATTR_MAX_DURATION = "max_duration"
+ATTR_MAX_LEGS = "max_legs"
+ATTR_OUT_AFTER = "outbound_after"
+ATTR_OUT_BEFORE = "outbound_before"
+ATTR_RET_AFTER = "return_after"
+ATTR_RET_BEFORE = "return_before"
+ATTR_SORT_BY = "sort_by"
+ATTR_LIMIT = "limit"
+
+SERVICE_BEST_FLIGHTS = "best_flights"
+ATTR_TICKET_CLASS = "ticket_class"
+ATTR_DEPART_FROM = "depart_from"
+ATTR_DEPART_TO = "depart_to"
+
+SERVICE_EXPORT_RESULTS = "export_results"
+ATTR_FORMAT = "format"
+ATTR_FILENAME = "filename"
+ATTR_INCLUDE_HISTORY = "include_history"
+ATTR_OVERWRITE = "overwrite"
+# Exports are written here, relative to the configuration directory
+EXPORT_DIR = f"{DOMAIN}/exports"
+# Rows are written to export files in chunks of this many
+EXPORT_CHUNK_ROWS = 1000
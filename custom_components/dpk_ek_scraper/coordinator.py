@@ -2,33 +2,73 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import secrets
-from datetime import timedelta
-from typing import TYPE_CHECKING
+import time
+import tracemalloc
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 from homeassistant.components import webhook
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+from homeassistant.util.json import json_loads
 
 from custom_components.dpk_ek_scraper.api_models import (
+    REASON_JSON,
+    REASON_MODEL,
+    DeltaMismatchError,
     Flight,
     FlightSearchResult,
+    PayloadError,
     ReturnFlight,
     TrackerStep,
 )
 
+from .combine import CombineLimits, combine_result
 from .const import (
     CONF_WEBHOOK,
+    DATA_INDEX,
+    DATA_METRICS,
+    DATA_TIMINGS,
     DOMAIN,
+    METRIC_ALLOCATED,
+    METRIC_JSON_DECODE,
+    METRIC_LOOP_BLOCK,
+    METRIC_RESULT_BUILD,
+    METRIC_STATE_WRITES,
+    METRIC_TRIGGER_RTT,
+    METRIC_UPDATE_FANOUT,
+    PARSE_BLOCK_WARN_SECONDS,
+    PARSE_EXECUTOR_MIN_BYTES,
     RAND_MAX_MINUTES,
     RAND_MIN_MINUTES,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    TRACKER_MAX_STEPS,
     UPDATE_INTERVAL,
 )
+from .index import FlightIndex, JobKey
+from .metrics import Metrics
+from .pareto import pareto_frontier, update_frontier
+from .price_statistics import PriceStatistics
+from .retention import RetentionPolicy, SequenceView, retained_size
+from .search import SearchTable
+from .trends import TrendTracker
+from .validation import validate_envelope
 
 _LOGGER = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from homeassistant.core import HomeAssistant
 
     from .api import (
@@ -36,6 +76,128 @@ if TYPE_CHECKING:
     )
 
 
+class _Decoded(NamedTuple):
+    """A decoded webhook body and how long each stage took."""
+
+    result: FlightSearchResult
+    frontier: list[ReturnFlight]
+    frontier_incremental: bool
+    decode_seconds: float
+    build_seconds: float
+    # the scraper found nothing new; result is base, untouched
+    unchanged: bool = False
+
+
+def _decode_result(
+    body: bytes | bytearray,
+    job_id: str,
+    base: FlightSearchResult | None,
+    base_frontier: list[ReturnFlight],
+    combine: CombineLimits | None = None,
+) -> _Decoded:
+    """
+    Decode a webhook body into a result, applying it to base if it is a delta.
+
+    Safe to run in the executor: base is only read, and a new result is built.
+    Timings are returned rather than recorded so metrics are only touched from
+    the event loop. With combine limits, the combined section is rebuilt from
+    the one-way lists. The envelope is validated before any model is built,
+    and an 'unchanged' reply naming base's version short-circuits to base.
+
+    Returns:
+        _Decoded: The resulting FlightSearchResult, its Pareto frontier and
+        the JSON decode and model build times.
+
+    Raises:
+        PayloadError: If the body is not a valid result document for job_id.
+        DeltaMismatchError: If a delta does not apply to base.
+
+    """
+    start = time.perf_counter()
+    try:
+        payload = json_loads(body)
+    except ValueError as err:
+        raise PayloadError(REASON_JSON, "(body)", str(err)) from err
+    decoded = time.perf_counter()
+    validate_envelope(payload, job_id)
+    if "unchanged" in payload:
+        if base is None or payload["unchanged"] != base.version:
+            msg = f"unchanged since {payload['unchanged']}, which is not held"
+            raise DeltaMismatchError(msg)
+        return _Decoded(base, base_frontier, True, decoded - start, 0.0, True)  # noqa: FBT003
+    if "delta" in payload and (base is None or not base.version):
+        msg = "no result to apply it to"
+        raise DeltaMismatchError(msg)
+    try:
+        if "delta" not in payload:
+            result = FlightSearchResult.from_dict(payload)
+        else:
+            result = base.apply_delta(payload)
+        if combine is not None:
+            result = combine_result(result, combine)
+    except (PayloadError, DeltaMismatchError):
+        raise
+    except Exception as err:
+        # anything the envelope check let through, e.g. an item that is
+        # not an object, is still the payload's fault and counted as such
+        msg = f"{type(err).__name__}: {err}"
+        raise PayloadError(REASON_MODEL, "(result)", msg) from err
+    frontier, incremental = update_frontier(base_frontier, base, result)
+    return _Decoded(
+        result,
+        frontier,
+        incremental,
+        decoded - start,
+        time.perf_counter() - decoded,
+    )
+
+
+def _step_durations(
+    tracker: list[TrackerStep],
+    triggered_at: datetime | None,
+    received_at: datetime,
+) -> list[tuple[str, float]]:
+    """
+    Derive how long the scraper spent in each step of its pipeline.
+
+    A step lasts from its own timestamp to the next step's. The time from our
+    trigger to the first step is reported as 'trigger', the last step runs
+    until the webhook was received, and 'total' covers the whole round trip.
+
+    Returns:
+        list[tuple[str, float]]: (step, seconds) pairs in pipeline order.
+
+    """
+    if not tracker:
+        return []
+    stamps = [
+        s.timestamp if s.timestamp.tzinfo else s.timestamp.replace(tzinfo=UTC)
+        for s in tracker
+    ]
+    durations = []
+    # only trust the trigger time if it precedes this run of the pipeline
+    if triggered_at is not None and triggered_at <= stamps[0]:
+        durations.append(("trigger", (stamps[0] - triggered_at).total_seconds()))
+    ends = [*stamps[1:], received_at]
+    durations.extend(
+        (slugify(step.step), (end - start).total_seconds())
+        for step, start, end in zip(tracker, stamps, ends, strict=True)
+    )
+    if triggered_at is not None and triggered_at <= stamps[0]:
+        durations.append(("total", (received_at - triggered_at).total_seconds()))
+    return durations
+
+
+def _storage_key(job_id: str) -> str:
+    """Return the storage key of the saved result of a job."""
+    return f"{DOMAIN}.{job_id}"
+
+
+def _trends_storage_key(job_id: str) -> str:
+    """Return the storage key of the saved price trends of a job."""
+    return f"{DOMAIN}.{job_id}.trends"
+
+
 class ScraperDataUpdateCoordinator(DataUpdateCoordinator[FlightSearchResult | None]):
     """Class to manage fetching data from the API."""
 
@@ -49,6 +211,62 @@ class ScraperDataUpdateCoordinator(DataUpdateCoordinator[FlightSearchResult | No
         self.config = config
         self.data: FlightSearchResult | None = None
         self.job_id = client.config.job_id()
+        # per step durations and client-side costs for this job, mirrored
+        # into the domain-wide sets
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        self.timings = Metrics(parent=domain_data.setdefault(DATA_TIMINGS, Metrics()))
+        self.metrics = Metrics(parent=domain_data.setdefault(DATA_METRICS, Metrics()))
+        # the client counts its timeouts alongside
+        client.metrics = self.metrics
+        # the best flights of this job are shared with the other entries
+        self.index: FlightIndex = domain_data.setdefault(DATA_INDEX, FlightIndex())
+        self.group = client.config.group_id()
+        self._index_key = JobKey(
+            client.config.origin,
+            client.config.destination,
+            client.config.ticket_class,
+            client.config.departure_date,
+            client.config.return_date,
+        )
+        self._triggered_at: datetime | None = None
+        # when the scraper last reported on the job, and last found changes
+        self.last_result_at: datetime | None = None
+        self.last_changed_at: datetime | None = None
+        # id -> combined itinerary of the current result, for O(1) lookups
+        self._return_index: dict[str, ReturnFlight] = {}
+        # round trips are built here when the scraper no longer sends them
+        self._combine: CombineLimits | None = None
+        if client.config.local_combine:
+            self._combine = CombineLimits(
+                max_duration=client.config.max_duration,
+                max_legs=client.config.max_legs,
+                min_stay=timedelta(hours=client.config.min_stay),
+                top_k=client.config.top_k,
+            )
+        # hourly price aggregates for the recorder's long-term statistics
+        self.statistics = PriceStatistics(hass, self.job_id)
+        # EWMA, rolling min/max and drops per itinerary and for the job
+        self.trends = TrendTracker()
+        self._trend_store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, _trends_storage_key(self.job_id)
+        )
+        # the one-way lists are only needed to combine round trips here
+        self._retention = RetentionPolicy(
+            one_way=client.config.local_combine, tracker_steps=TRACKER_MAX_STEPS
+        )
+        # non-dominated itineraries (price, duration, legs) of the current result
+        self.frontier: list[ReturnFlight] = []
+        # search rows of the current result, built on the first search
+        self._search_table: SearchTable | None = None
+        self._search_source: FlightSearchResult | None = None
+        # results waiting for the coalescing window to close
+        self._publish_unsub: CALLBACK_TYPE | None = None
+        self._pending_since = 0.0
+        self._pending_blocked = 0.0
+        # last accepted result, so sensors have state straight after a restart
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, _storage_key(self.job_id)
+        )
 
         super().__init__(
             hass=hass,
@@ -57,6 +275,61 @@ class ScraperDataUpdateCoordinator(DataUpdateCoordinator[FlightSearchResult | No
             update_interval=UPDATE_INTERVAL,
         )
 
+    async def async_restore(self) -> None:
+        """Restore the result, trends and statistics hour saved before a restart."""
+        trends = await self._trend_store.async_load()
+        if trends:
+            try:
+                self.trends.restore(trends)
+                self.statistics.restore(
+                    trends.get("statistics") or {}, dt_util.utcnow()
+                )
+            except (KeyError, TypeError, ValueError) as err:
+                _LOGGER.warning(
+                    "Discarding saved trends for job %s: %s", self.job_id, err
+                )
+        saved = await self._store.async_load()
+        if not saved:
+            return
+        try:
+            result = await self.hass.async_add_executor_job(
+                FlightSearchResult.from_saved, saved
+            )
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Discarding saved result for job %s: %s", self.job_id, err)
+            return
+        self.frontier = await self.hass.async_add_executor_job(
+            pareto_frontier, result.return_flights
+        )
+        if not self._retention.kept(saved):
+            # e.g. saved without the one-way lists that combining locally
+            # needs: deltas against it would lose itineraries, so the version
+            # is not advertised and the scraper replies with a full snapshot
+            _LOGGER.debug(
+                "Saved result for job %s was kept under another policy", self.job_id
+            )
+            result = replace(result, version="")
+        self.data = self._retention.apply(result)
+        self._return_index = {f.id: f for f in result.return_flights}
+        self.index.update(
+            self.job_id, self._index_key, self.group, result.return_flights
+        )
+        _LOGGER.debug(
+            "Restored %d results for job %s", len(result.return_flights), self.job_id
+        )
+
+    async def async_delayed_refresh(self, delay: float) -> None:
+        """Trigger the first scrape after delay seconds, without blocking setup."""
+        if delay:
+            await asyncio.sleep(delay)
+        await self.async_refresh()
+
+    @classmethod
+    async def async_remove_saved_result(cls, hass: HomeAssistant, job_id: str) -> None:
+        """Remove the saved result and trends of a job whose entry was deleted."""
+        await Store(hass, STORAGE_VERSION, _storage_key(job_id)).async_remove()
+        await Store(hass, STORAGE_VERSION, _trends_storage_key(job_id)).async_remove()
+
     async def _async_update_data(self) -> FlightSearchResult | None:
         """Queue the scrape job on schedule."""
         try:
@@ -66,7 +339,14 @@ class ScraperDataUpdateCoordinator(DataUpdateCoordinator[FlightSearchResult | No
                 msg = "Webhook ID is missing in the configuration."
                 raise UpdateFailed(msg)  # noqa: TRY301
             url = webhook.async_generate_url(self.hass, webhook_id)
-            await self.api.trigger_scrape(url)
+            self._triggered_at = dt_util.utcnow()
+            with self.metrics.timer(METRIC_TRIGGER_RTT):
+                if self.data is not None:
+                    await self.api.trigger_scrape(
+                        url, version=self.data.version, hashes=self.data.hashes
+                    )
+                else:
+                    await self.api.trigger_scrape(url)
         except Exception as err:
             raise UpdateFailed(f"API error: {err}") from err  # noqa: EM102, TRY003
         # After triggering, randomize the next interval -basically between the
@@ -80,17 +360,81 @@ class ScraperDataUpdateCoordinator(DataUpdateCoordinator[FlightSearchResult | No
         return self.data
 
     @callback
-    async def async_handle_webhook(self, payload: dict) -> None:
-        """Receive results for any job (expecting matching job_id)."""
-        self.job_id = payload.get("job_id")
-        result: FlightSearchResult = FlightSearchResult.from_dict(payload)
-        if result.job_id != self.job_id:
+    async def async_handle_webhook(self, body: bytes | bytearray) -> None:
+        """
+        Receive results for this job, rejecting malformed or foreign payloads.
+
+        Small bodies are decoded and parsed inline. Bodies of
+        PARSE_EXECUTOR_MIN_BYTES or more are handed to the executor so a large
+        result does not block the event loop while it is built.
+        """
+        received_at = dt_util.utcnow()
+        # allocation accounting is only available when HA runs under
+        # tracemalloc (PYTHONTRACEMALLOC=1), e.g. for the fan-out harness
+        tracing = tracemalloc.is_tracing()
+        allocated_base = 0
+        if tracing:
+            tracemalloc.reset_peak()
+            allocated_base = tracemalloc.get_traced_memory()[0]
+        blocked = 0.0
+        base = self.data
+        try:
+            if len(body) >= PARSE_EXECUTOR_MIN_BYTES:
+                self.metrics.incr("parse_executor")
+                decoded = await self.hass.async_add_executor_job(
+                    _decode_result,
+                    body,
+                    self.job_id,
+                    base,
+                    self.frontier,
+                    self._combine,
+                )
+            else:
+                self.metrics.incr("parse_inline")
+                decoded = _decode_result(
+                    body, self.job_id, base, self.frontier, self._combine
+                )
+                elapsed = blocked = decoded.decode_seconds + decoded.build_seconds
+                if elapsed > PARSE_BLOCK_WARN_SECONDS:
+                    _LOGGER.warning(
+                        "Parsing %d byte result for job %s blocked the event "
+                        "loop for %.3f s",
+                        len(body),
+                        self.job_id,
+                        elapsed,
+                    )
+        except DeltaMismatchError as err:
+            # the next trigger advertises our version again, so the
+            # scraper can send a fresh delta or a full snapshot
+            self.metrics.incr("rejected_delta")
+            _LOGGER.warning("Ignoring delta for job %s: %s", self.job_id, err)
+            return
+        except PayloadError as err:
+            self.metrics.incr(f"rejected_{err.reason}")
             _LOGGER.warning(
-                "Webhook job_id %s does not match this coordinator (%s)",
-                result.job_id,
+                "Rejected webhook payload for job %s at %s",
+                self.job_id,
+                err,
+            )
+            return
+
+        self.metrics.observe(METRIC_JSON_DECODE, decoded.decode_seconds)
+        self.last_result_at = received_at
+        triggered_at, self._triggered_at = self._triggered_at, None
+        if decoded.unchanged:
+            # nothing to build, save or publish: only freshness moves on
+            self.metrics.incr("result_unchanged")
+            self._async_record_prices(decoded.result, received_at, trends=False)
+            _LOGGER.debug(
+                "Result for job %s unchanged at version %s",
                 self.job_id,
+                decoded.result.version,
             )
             return
+        self.metrics.incr("result_changed")
+        self.last_changed_at = received_at
+        self.metrics.observe(METRIC_RESULT_BUILD, decoded.build_seconds)
+        result = decoded.result
 
         _LOGGER.info(
             "Webhook update for job %s (%d results)",
@@ -98,27 +442,155 @@ class ScraperDataUpdateCoordinator(DataUpdateCoordinator[FlightSearchResult | No
             len(result.return_flights),
         )
 
+        for step, seconds in _step_durations(result.tracker, triggered_at, received_at):
+            self.timings.observe(step, seconds)
+
+        result = self._retention.apply(result)
         self.data = result
+        self._async_record_prices(result, received_at)
+        self._return_index = {f.id: f for f in result.return_flights}
+        self.frontier = decoded.frontier
+        self.metrics.incr(
+            "frontier_incremental" if decoded.frontier_incremental else "frontier_full"
+        )
+        self._store.async_delay_save(
+            partial(self._retention.to_saved, result), STORAGE_SAVE_DELAY
+        )
+        self._pending_blocked += blocked
+        self._async_schedule_publish()
+        if tracing:
+            self.metrics.observe(
+                METRIC_ALLOCATED, tracemalloc.get_traced_memory()[1] - allocated_base
+            )
+
+    @callback
+    def _async_record_prices(
+        self, result: FlightSearchResult, received_at: datetime, *, trends: bool = True
+    ) -> None:
+        """
+        Fold a result's prices into the statistics and, if new, the trends.
+
+        An unchanged result still counts as a scrape for the statistics, but
+        would only repeat its prices in the trends.
+        """
+        self.statistics.add(result, received_at)
+        if trends:
+            self.trends.update(result, received_at.timestamp())
+        self._trend_store.async_delay_save(self._price_history, STORAGE_SAVE_DELAY)
+
+    def _price_history(self) -> dict[str, Any]:
+        """Return the trends and the statistics hour in progress, for the Store."""
+        return {**self.trends.to_dict(), "statistics": self.statistics.to_dict()}
+
+    @callback
+    def _async_schedule_publish(self) -> None:
+        """
+        Publish the current result to entities, coalescing bursts of results.
+
+        Each result restarts the coalescing window, but the first pending
+        result is never held back longer than the configured max latency.
+        """
+        window = self.api.config.coalesce_window
+        if window <= 0:
+            self._async_publish()
+            return
+        now = time.monotonic()
+        if self._publish_unsub is None:
+            self._pending_since = now
+        else:
+            self._publish_unsub()
+            self.metrics.incr("updates_coalesced")
+        deadline = self._pending_since + self.api.config.coalesce_max_latency
+        self._publish_unsub = async_call_later(
+            self.hass, max(min(window, deadline - now), 0), self._async_publish_later
+        )
+
+    @callback
+    def _async_publish_later(self, _now: datetime) -> None:
+        """Publish once the coalescing window has closed."""
+        self._publish_unsub = None
+        self._async_publish()
+
+    @callback
+    def async_cancel_publish(self) -> None:
+        """Drop a pending publish, e.g. when the entry is unloaded."""
+        if self._publish_unsub is not None:
+            self._publish_unsub()
+            self._publish_unsub = None
+
+    @callback
+    def _async_publish(self) -> None:
+        """Hand the current result to the index and the entities."""
+        result = self.data
+        if result is None:
+            return
+        self.metrics.incr("updates_published")
+        writes = self.metrics.counters[METRIC_STATE_WRITES]
+        # listeners run synchronously, so this times the whole entity fan-out
+        start = time.perf_counter()
+        self.index.update(
+            self.job_id, self._index_key, self.group, result.return_flights
+        )
         self.async_set_updated_data(result)
+        fanout = time.perf_counter() - start
+        self.metrics.observe(METRIC_UPDATE_FANOUT, fanout)
+        self.metrics.observe(METRIC_LOOP_BLOCK, self._pending_blocked + fanout)
+        self._pending_blocked = 0.0
+        self.metrics.observe(
+            METRIC_STATE_WRITES, self.metrics.counters[METRIC_STATE_WRITES] - writes
+        )
+
+    def get_return_flight(self, flight_id: str) -> ReturnFlight | None:
+        """Return the current itinerary with the given id, if it is still offered."""
+        return self._return_index.get(flight_id)
+
+    def search_table(self) -> SearchTable | None:
+        """Return the search rows of the current result."""
+        if self.data is None:
+            return None
+        if self._search_source is not self.data:
+            self._search_table = SearchTable(self.job_id, self.data.return_flights)
+            self._search_source = self.data
+        return self._search_table
+
+    def flight_version(self, flight_id: str) -> str | None:
+        """Return the content hash of an itinerary in the current result."""
+        if self.data is None:
+            return None
+        return self.data.hashes.get("combined", {}).get(flight_id)
 
     @property
-    def return_flights(self) -> list[ReturnFlight]:
-        """Typed accessor for the coordinator data (never None)."""
-        # self.data can be None before first refresh; return empty list in that
-        # case
-        return list(self.data.return_flights) if self.data else []
+    def return_flights(self) -> Sequence[ReturnFlight]:
+        """Read-only view of the current itineraries (empty before a result)."""
+        return SequenceView(self.data.return_flights) if self.data else ()
 
     @property
-    def all_flights(self) -> list[Flight]:
-        """Typed accessor for the coordinator data (never None)."""
-        # self.data can be None before first refresh; return empty list in that case
-        return list(self.data.all_flights) if self.data else []
+    def all_flights(self) -> Sequence[Flight]:
+        """Read-only view of the retained outbound and return flights."""
+        if not self.data:
+            return ()
+        return SequenceView(self.data.outbound, self.data.return_)
 
     @property
-    def tracker(self) -> list[TrackerStep]:
-        """Typed accessor for the coordinator data (never None)."""
-        # self.data can be None before first refresh; return empty list in that case
-        return list(self.data.tracker) if self.data else []
+    def tracker(self) -> Sequence[TrackerStep]:
+        """Read-only view of the retained tracker steps."""
+        return SequenceView(self.data.tracker) if self.data else ()
+
+    def retained_size(self) -> dict[str, int]:
+        """Estimate the bytes this coordinator holds on to, by part."""
+        data = self.data
+        table = self._search_table
+        return retained_size(
+            (
+                ("combined", data.return_flights if data else None),
+                ("one_way", (data.outbound, data.return_) if data else None),
+                ("tracker", data.tracker if data else None),
+                ("hashes", data.hashes if data else None),
+                ("return_index", self._return_index),
+                ("frontier", self.frontier),
+                ("search", table.rows if table else None),
+            )
+        )
 
     @property
     def is_ok(self) -> bool:
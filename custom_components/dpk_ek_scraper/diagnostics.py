@@ -0,0 +1,77 @@
+"""Diagnostics support for the scraper."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+
+from .catalog import CATALOG
+from .const import CONF_WEBHOOK, DATA_METRICS, DATA_TIMINGS, DOMAIN
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from homeassistant.core import HomeAssistant
+
+    from .coordinator import ScraperDataUpdateCoordinator
+    from .data import ScraperConfigEntry
+
+TO_REDACT = {CONF_WEBHOOK}
+
+
+def _isoformat(moment: datetime | None) -> str | None:
+    """Format an optional timestamp."""
+    return moment.isoformat() if moment is not None else None
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ScraperConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: ScraperDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        "coordinator"
+    ]
+    data = coordinator.data
+    result = None
+    if data is not None:
+        result = {
+            "result": data.result,
+            "version": data.version,
+            "outbound": len(data.outbound),
+            "return": len(data.return_),
+            "combined": len(data.return_flights),
+            "tracker": [step.to_dict() for step in data.tracker],
+        }
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "job_id": coordinator.job_id,
+        "group": {
+            "name": coordinator.group,
+            "members": sorted(coordinator.index.members(coordinator.group)),
+        },
+        "last_update_success": coordinator.last_update_success,
+        "last_result_at": _isoformat(coordinator.last_result_at),
+        "last_changed_at": _isoformat(coordinator.last_changed_at),
+        "result": result,
+        # bytes held by this entry; the shared catalog is counted separately
+        "retained": await hass.async_add_executor_job(coordinator.retained_size),
+        "catalog": CATALOG.sizes(),
+        "timeouts": {
+            operation: asdict(budgets)
+            for operation, budgets in coordinator.api.timeouts.items()
+        },
+        "timings": {
+            "job": coordinator.timings.as_dict(),
+            "overall": hass.data[DOMAIN][DATA_TIMINGS].as_dict(),
+        },
+        "metrics": {
+            "job": coordinator.metrics.as_dict(),
+            "overall": hass.data[DOMAIN][DATA_METRICS].as_dict(),
+        },
+    }
@@ -0,0 +1,192 @@
+"""
+Stream the current results, and the retained price history, to a file.
+
+Rows are generated one at a time from the results and written in chunks of
+EXPORT_CHUNK_ROWS, so memory stays constant however many itineraries are
+exported. Every format has the same columns: 'itinerary' rows carry one
+itinerary of a result, 'history' rows one day of an itinerary's (or, with an
+empty id, the job's cheapest) price trend. Parquet needs pyarrow, which is
+imported only when asked for. Files are created exclusively unless told to
+overwrite, so an export never replaces a file by accident.
+"""
+
+from __future__ import annotations
+
+import csv
+import importlib.util
+import json
+from datetime import UTC, datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from .const import EXPORT_CHUNK_ROWS
+from .trends import SECONDS_PER_DAY
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+    from .api_models import FlightSearchResult
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+FORMATS = (FORMAT_NDJSON, FORMAT_CSV, FORMAT_PARQUET)
+
+RECORD_ITINERARY = "itinerary"
+RECORD_HISTORY = "history"
+
+STRING_FIELDS = (
+    "record",
+    "job_id",
+    "id",
+    "time",
+    "currency",
+    "out_depart",
+    "out_arrive",
+    "out_route",
+    "out_legs",
+    "ret_depart",
+    "ret_arrive",
+    "ret_route",
+    "ret_legs",
+)
+NUMBER_FIELDS = ("price", "price_min", "price_max", "duration")
+FIELDS = (*STRING_FIELDS[:4], *NUMBER_FIELDS, *STRING_FIELDS[4:])
+
+# (id, [[day, min, max], ...]) of each price series, taken on the event loop
+HistorySnapshot = list[tuple[str, tuple[list[float], ...]]]
+
+
+def itinerary_rows(
+    job_id: str, result: FlightSearchResult, exported_at: str
+) -> Iterator[dict[str, Any]]:
+    """Yield one row per itinerary of a result."""
+    for flight in result.return_flights:
+        outbound, return_ = flight.schedule.outbound, flight.schedule.return_
+        yield {
+            "record": RECORD_ITINERARY,
+            "job_id": job_id,
+            "id": flight.id,
+            "time": exported_at,
+            "price": flight.price.total,
+            "price_min": None,
+            "price_max": None,
+            "duration": flight.duration.total,
+            "currency": flight.price.currency,
+            "out_depart": outbound.depart,
+            "out_arrive": outbound.arrive,
+            "out_route": outbound.airport,
+            "out_legs": " ".join(flight.outbound_legs),
+            "ret_depart": return_.depart,
+            "ret_arrive": return_.arrive,
+            "ret_route": return_.airport,
+            "ret_legs": " ".join(flight.return_legs),
+        }
+
+
+def history_rows(job_id: str, history: HistorySnapshot) -> Iterator[dict[str, Any]]:
+    """Yield one row per day of each price series."""
+    empty = dict.fromkeys(FIELDS)
+    for series_id, days in history:
+        for day, low, high in days:
+            yield empty | {
+                "record": RECORD_HISTORY,
+                "job_id": job_id,
+                "id": series_id,
+                "time": datetime.fromtimestamp(day * SECONDS_PER_DAY, UTC)
+                .date()
+                .isoformat(),
+                "price_min": low,
+                "price_max": high,
+            }
+
+
+def _chunks(rows: Iterable[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    """Group rows into lists of at most EXPORT_CHUNK_ROWS."""
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, EXPORT_CHUNK_ROWS)):
+        yield chunk
+
+
+def _write_ndjson(path: Path, rows: Iterable[dict[str, Any]], mode: str) -> int:
+    count = 0
+    with path.open(mode, encoding="utf-8") as file:
+        for chunk in _chunks(rows):
+            file.write("".join(json.dumps(row) + "\n" for row in chunk))
+            count += len(chunk)
+    return count
+
+
+def _write_csv(path: Path, rows: Iterable[dict[str, Any]], mode: str) -> int:
+    count = 0
+    with path.open(mode, encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        for chunk in _chunks(rows):
+            writer.writerows(chunk)
+            count += len(chunk)
+    return count
+
+
+def _write_parquet(path: Path, rows: Iterable[dict[str, Any]], mode: str) -> int:
+    import pyarrow as pa  # noqa: PLC0415
+    import pyarrow.parquet as pq  # noqa: PLC0415
+
+    schema = pa.schema(
+        [
+            (name, pa.float64() if name in NUMBER_FIELDS else pa.string())
+            for name in FIELDS
+        ]
+    )
+    count = 0
+    with path.open(f"{mode}b") as file, pq.ParquetWriter(file, schema) as writer:
+        for chunk in _chunks(rows):
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+
+WRITERS = {
+    FORMAT_NDJSON: _write_ndjson,
+    FORMAT_CSV: _write_csv,
+    FORMAT_PARQUET: _write_parquet,
+}
+
+
+def parquet_available() -> bool:
+    """Tell whether pyarrow is installed."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def export(
+    path: Path,
+    file_format: str,
+    jobs: Iterable[tuple[str, FlightSearchResult | None, HistorySnapshot]],
+    *,
+    overwrite: bool = False,
+) -> int:
+    """
+    Write the itineraries and history of each job to path, in file_format.
+
+    Runs in the executor: the results are only read, and histories are
+    snapshots taken on the event loop. The directory of path is created if
+    needed.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        FileExistsError: If path exists and overwrite is not set.
+
+    """
+    exported_at = datetime.now(UTC).isoformat()
+
+    def rows() -> Iterator[dict[str, Any]]:
+        for job_id, result, history in jobs:
+            if result is not None:
+                yield from itinerary_rows(job_id, result, exported_at)
+            yield from history_rows(job_id, history)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return WRITERS[file_format](path, rows(), "w" if overwrite else "x")
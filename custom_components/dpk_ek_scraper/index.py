@@ -0,0 +1,198 @@
+"""
+Domain-wide index of the best flights of every configured job.
+
+Each coordinator reports its results here as they arrive. The index only
+keeps each job's cheapest and fastest itinerary, so answering "what is the
+cheapest across this group of trips" only looks at one candidate per entry,
+and the answer is cached until a member of the group changes.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from .api_models import ReturnFlight
+
+BY_PRICE = "price"
+BY_DURATION = "duration"
+
+# ties on the primary measure are broken by the other one
+SORT_KEYS: dict[str, Callable[[ReturnFlight], tuple[float, float]]] = {
+    BY_PRICE: lambda f: (f.price.total, f.duration.total),
+    BY_DURATION: lambda f: (f.duration.total, f.price.total),
+}
+
+
+class JobKey(NamedTuple):
+    """What a job searches for: route, class and dates."""
+
+    origin: str
+    destination: str
+    ticket_class: str
+    departure_date: str
+    return_date: str
+
+
+@dataclass(frozen=True)
+class IndexedFlight:
+    """The best itinerary of one job, by one measure."""
+
+    job_id: str
+    key: JobKey
+    group: str
+    flight: ReturnFlight
+
+    def to_dict(self) -> dict:
+        """Return a summary suitable for state attributes or service responses."""
+        return {
+            "job_id": self.job_id,
+            "group": self.group,
+            **self.key._asdict(),
+            "flight_id": self.flight.id,
+            "price": self.flight.price.total,
+            "currency": self.flight.price.currency,
+            "duration": self.flight.duration.total,
+        }
+
+
+@dataclass
+class _Job:
+    """Index entry of one job."""
+
+    key: JobKey
+    group: str
+    best: dict[str, IndexedFlight]
+
+
+class FlightIndex:
+    """Cheapest and fastest itinerary per job, queryable by group or key."""
+
+    def __init__(self) -> None:
+        """Initialise an empty index."""
+        self._jobs: dict[str, _Job] = {}
+        self._groups: dict[str, set[str]] = {}
+        # (group, measure) -> best of the group, dropped when a member changes
+        self._cache: dict[tuple[str, str], IndexedFlight | None] = {}
+        self._listeners: dict[str, list[Callable[[], None]]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed jobs."""
+        return len(self._jobs)
+
+    def members(self, group: str) -> frozenset[str]:
+        """Return the job ids of a group."""
+        return frozenset(self._groups.get(group, ()))
+
+    def update(
+        self,
+        job_id: str,
+        key: JobKey,
+        group: str,
+        flights: Iterable[ReturnFlight],
+    ) -> None:
+        """
+        Replace the indexed flights of a job with those of its latest result.
+
+        Only this job's flights are scanned, once for every measure; the rest
+        of the index is left as it is.
+        """
+        flights = list(flights)
+        best = {
+            measure: IndexedFlight(job_id, key, group, min(flights, key=sort_key))
+            for measure, sort_key in SORT_KEYS.items()
+            if flights
+        }
+        previous = self._jobs.get(job_id)
+        if previous is not None and previous.group != group:
+            self._discard(job_id, previous.group)
+        self._jobs[job_id] = _Job(key, group, best)
+        self._groups.setdefault(group, set()).add(job_id)
+        self._changed(group)
+
+    def remove(self, job_id: str) -> None:
+        """Remove a job, e.g. when its config entry is unloaded."""
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            self._discard(job_id, job.group)
+
+    def best(self, group: str, by: str = BY_PRICE) -> IndexedFlight | None:
+        """Return the best itinerary across the jobs of a group."""
+        cache_key = (group, by)
+        if cache_key not in self._cache:
+            self._cache[cache_key] = min(
+                (
+                    best
+                    for job_id in self._groups.get(group, ())
+                    if (best := self._jobs[job_id].best.get(by)) is not None
+                ),
+                key=lambda indexed: SORT_KEYS[by](indexed.flight),
+                default=None,
+            )
+        return self._cache[cache_key]
+
+    def query(  # noqa: PLR0913
+        self,
+        by: str = BY_PRICE,
+        *,
+        group: str | None = None,
+        origin: str | None = None,
+        destination: str | None = None,
+        ticket_class: str | None = None,
+        depart_from: str | None = None,
+        depart_to: str | None = None,
+    ) -> list[IndexedFlight]:
+        """
+        Return the best itinerary of every matching job, best first.
+
+        Filters left as None match everything. Dates are ISO strings, so
+        depart_from and depart_to compare as strings and are inclusive.
+        """
+        job_ids = self._groups.get(group, set()) if group is not None else self._jobs
+        matches = []
+        for job_id in job_ids:
+            job = self._jobs[job_id]
+            key = job.key
+            if (
+                (origin is not None and key.origin != origin)
+                or (destination is not None and key.destination != destination)
+                or (ticket_class is not None and key.ticket_class != ticket_class)
+                or (depart_from is not None and key.departure_date < depart_from)
+                or (depart_to is not None and key.departure_date > depart_to)
+            ):
+                continue
+            if (best := job.best.get(by)) is not None:
+                matches.append(best)
+        matches.sort(key=lambda indexed: SORT_KEYS[by](indexed.flight))
+        return matches
+
+    def async_add_listener(
+        self, group: str, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Call update_callback whenever a job of the group changes."""
+        listeners = self._listeners.setdefault(group, [])
+        listeners.append(update_callback)
+
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _discard(self, job_id: str, group: str) -> None:
+        """Take a job out of a group."""
+        jobs = self._groups.get(group)
+        if jobs is not None:
+            jobs.discard(job_id)
+            if not jobs:
+                del self._groups[group]
+        self._changed(group)
+
+    def _changed(self, group: str) -> None:
+        """Drop the cached answers of a group and notify its listeners."""
+        for measure in SORT_KEYS:
+            self._cache.pop((group, measure), None)
+        for update_callback in list(self._listeners.get(group, ())):
+            update_callback()
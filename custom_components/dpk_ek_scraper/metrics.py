@@ -0,0 +1,101 @@
+"""
+Lightweight rolling metrics for the scraper integration.
+
+Measurements are kept as fixed-size windows of recent samples, so memory is
+bounded and recording a sample is O(1). Percentiles are only computed when a
+summary is read (diagnostics download or a diagnostic sensor update).
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+HISTORY_SIZE = 256
+
+
+class RollingHistogram:
+    """Keep the most recent samples of a measurement and summarise them."""
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        """Initialise an empty window of at most size samples."""
+        self._samples: deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Record a sample."""
+        self._samples.append(value)
+        self.count += 1
+
+    def percentile(self, pct: float) -> float | None:
+        """
+        Return the nearest-rank percentile of the samples in the window.
+
+        Args:
+            pct (float): The percentile to return, 0-100.
+
+        Returns:
+            float | None: The percentile, or None if there are no samples.
+
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def summary(self) -> dict[str, Any]:
+        """Return count, p50, p95 and max of the window."""
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": max(self._samples, default=None),
+        }
+
+
+class Metrics:
+    """Named counters and rolling histograms, optionally mirrored into a parent."""
+
+    def __init__(self, parent: Metrics | None = None) -> None:
+        """Initialise an empty set, mirroring samples into parent if given."""
+        self._parent = parent
+        self.counters: Counter[str] = Counter()
+        self.histograms: dict[str, RollingHistogram] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        """Increment the named counter."""
+        self.counters[name] += value
+        if self._parent is not None:
+            self._parent.incr(name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a sample for the named histogram."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram()
+        histogram.add(value)
+        if self._parent is not None:
+            self._parent.observe(name, value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Record the wall time of the with-block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters and a summary of every histogram, for diagnostics."""
+        return {
+            "counters": dict(self.counters),
+            "histograms": {name: h.summary() for name, h in self.histograms.items()},
+        }
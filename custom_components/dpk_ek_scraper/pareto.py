@@ -0,0 +1,98 @@
+"""
+Pareto frontier of itineraries over total price, total duration and legs.
+
+An itinerary is on the frontier when no other itinerary is at least as good
+on all three measures and better on one. Sorting by price first means only
+earlier itineraries can dominate a later one; because leg counts are small
+integers, the shortest duration seen so far per leg count answers "is there
+an earlier one at least as fast with no more legs" in O(legs). The sweep is
+O(n log n) overall.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .api_models import FlightSearchResult, ReturnFlight
+
+# a result whose itineraries changed by more than this share is swept again
+INCREMENTAL_MAX_CHANGED = 0.1
+
+
+def point(flight: ReturnFlight) -> tuple[float, float, int]:
+    """Return the (price, duration, legs) an itinerary is compared on."""
+    return (
+        flight.price.total,
+        flight.duration.total,
+        len(flight.outbound_leg_ids) + len(flight.return_leg_ids),
+    )
+
+
+def pareto_frontier(flights: Iterable[ReturnFlight]) -> list[ReturnFlight]:
+    """
+    Return the non-dominated itineraries, cheapest first.
+
+    Itineraries equal on all three measures do not dominate each other, so
+    all of them are kept.
+    """
+    ranked = sorted(((point(flight), flight) for flight in flights), key=_rank)
+    frontier: list[ReturnFlight] = []
+    kept: set[tuple[float, float, int]] = set()
+    # shortest duration among the itineraries kept so far, per leg count
+    fastest: dict[int, float] = {}
+    for values, flight in ranked:
+        _, duration, legs = values
+        best = min(
+            (seen for count, seen in fastest.items() if count <= legs),
+            default=None,
+        )
+        if best is not None and (
+            best < duration or (best == duration and values not in kept)
+        ):
+            continue
+        frontier.append(flight)
+        kept.add(values)
+        if duration < fastest.get(legs, float("inf")):
+            fastest[legs] = duration
+    return frontier
+
+
+def update_frontier(
+    frontier: list[ReturnFlight],
+    base: FlightSearchResult | None,
+    result: FlightSearchResult,
+) -> tuple[list[ReturnFlight], bool]:
+    """
+    Return the frontier of result, reusing the frontier of base if possible.
+
+    When none of the frontier's itineraries changed or went away, everything
+    off the frontier is still dominated, so only the frontier and the changed
+    or new itineraries need to be swept. Otherwise, or when much of the
+    result changed, the whole result is swept again.
+
+    Returns:
+        tuple[list[ReturnFlight], bool]: The frontier, and whether it was
+        updated incrementally.
+
+    """
+    if base is None or not base.version:
+        return pareto_frontier(result.return_flights), False
+    old = base.hashes.get("combined", {})
+    new = result.hashes.get("combined", {})
+    changed = {fid for fid, digest in new.items() if old.get(fid) != digest}
+    if len(changed) > INCREMENTAL_MAX_CHANGED * max(len(new), 1) or any(
+        new.get(flight.id) != old.get(flight.id) for flight in frontier
+    ):
+        return pareto_frontier(result.return_flights), False
+    if not changed:
+        return frontier, True
+    candidates = [flight for flight in result.return_flights if flight.id in changed]
+    return pareto_frontier([*frontier, *candidates]), True
+
+
+def _rank(item: tuple[tuple[float, float, int], ReturnFlight]) -> tuple:
+    """Sort key: the measures, then the id for a stable order."""
+    return (*item[0], item[1].id)
@@ -0,0 +1,180 @@
+"""
+Hourly price statistics of a job, imported into the recorder's long-term tables.
+
+Every accepted result is reduced once to the min, mean and max total price of
+its itineraries and folded into the bucket of its hour. Completed hours are
+held back and imported in one batch per statistic when the coordinator flushes
+them, as external statistics ('dpk_ek_scraper:<job_id>_price' and
+'..._cheapest'), so dashboards can chart months of prices without reading
+entity state history. The hour in progress is saved with the trends, so an
+hour spanning a restart keeps the scrapes from before it.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .api_models import FlightSearchResult
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _hour_of(at: datetime) -> datetime:
+    """Return the start of the UTC hour at falls in."""
+    return dt_util.as_utc(at).replace(minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class _HourBucket:
+    """Aggregates of the results received within one hour."""
+
+    start: datetime
+    scrapes: int = 0
+    low: float = float("inf")
+    high: float = float("-inf")
+    mean_sum: float = 0.0
+    cheapest_sum: float = 0.0
+    cheapest_high: float = float("-inf")
+
+    def add(self, low: float, mean: float, high: float) -> None:
+        """Fold in the min, mean and max price of one result."""
+        self.scrapes += 1
+        self.low = min(self.low, low)
+        self.high = max(self.high, high)
+        self.mean_sum += mean
+        self.cheapest_sum += low
+        self.cheapest_high = max(self.cheapest_high, low)
+
+    def price(self) -> StatisticData:
+        """Return the spread of every itinerary's price over the hour."""
+        return StatisticData(
+            start=self.start,
+            min=self.low,
+            mean=self.mean_sum / self.scrapes,
+            max=self.high,
+        )
+
+    def cheapest(self) -> StatisticData:
+        """Return the spread of the cheapest itinerary's price over the hour."""
+        return StatisticData(
+            start=self.start,
+            min=self.low,
+            mean=self.cheapest_sum / self.scrapes,
+            max=self.cheapest_high,
+        )
+
+
+class PriceStatistics:
+    """Buffer a job's hourly price aggregates and import them in batches."""
+
+    def __init__(self, hass: HomeAssistant, job_id: str) -> None:
+        """Initialise an empty buffer for a job."""
+        self.hass = hass
+        self.job_id = job_id
+        self.currency: str | None = None
+        self._current: _HourBucket | None = None
+        self._completed: list[_HourBucket] = []
+        # the aggregates of the last result, reused when it is reported again
+        self._last: tuple[FlightSearchResult, tuple[float, float, float]] | None = None
+
+    def add(self, result: FlightSearchResult, received_at: datetime) -> None:
+        """Fold a result's prices into the bucket of the hour it arrived in."""
+        if self._last is not None and self._last[0] is result:
+            aggregates = self._last[1]
+        else:
+            prices = [flight.price.total for flight in result.return_flights]
+            if not prices:
+                return
+            aggregates = (min(prices), sum(prices) / len(prices), max(prices))
+            self._last = (result, aggregates)
+            self.currency = result.return_flights[0].price.currency
+        start = _hour_of(received_at)
+        if self._current is None or self._current.start != start:
+            if self._current is not None:
+                self._completed.append(self._current)
+            self._current = _HourBucket(start)
+        self._current.add(*aggregates)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the hour in progress, for a Store."""
+        current = self._current
+        return {
+            "currency": self.currency,
+            "current": (
+                None
+                if current is None
+                else [current.start.isoformat(), *astuple(current)[1:]]
+            ),
+        }
+
+    def restore(self, data: dict[str, Any], now: datetime) -> None:
+        """
+        Resume the hour in progress saved with to_dict.
+
+        Scrapes after a restart are added to those from before it, so
+        importing the hour again keeps them. A saved hour that has ended since
+        is queued for the next flush.
+        """
+        self.currency = self.currency or data.get("currency")
+        if not data.get("current"):
+            return
+        start, *values = data["current"]
+        bucket = _HourBucket(datetime.fromisoformat(start), *values)
+        if bucket.start == _hour_of(now) and self._current is None:
+            self._current = bucket
+        else:
+            self._completed.append(bucket)
+
+    @callback
+    def async_flush(self, _now: datetime | None = None, *, final: bool = False) -> None:
+        """
+        Import the completed hours, and with final the current one too.
+
+        An hour imported again replaces its earlier rows, so a partial hour
+        imported by a final flush is only complete once imported again with
+        every scrape of the hour: the hour in progress must be saved and
+        restored across the restart, or its earlier scrapes are lost.
+        """
+        buckets = self._completed
+        if final and self._current is not None:
+            buckets = [*buckets, self._current]
+        if not buckets or self.currency is None:
+            return
+        if "recorder" not in self.hass.config.components:
+            _LOGGER.debug("Recorder not loaded, dropping %d hours", len(buckets))
+            self._completed = []
+            return
+        for suffix, name, row in (
+            ("price", "price", _HourBucket.price),
+            ("cheapest", "cheapest price", _HourBucket.cheapest),
+        ):
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{self.job_id} {name}",
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{self.job_id}_{suffix}",
+                unit_of_measurement=self.currency,
+            )
+            async_add_external_statistics(
+                self.hass, metadata, [row(bucket) for bucket in buckets]
+            )
+        _LOGGER.debug(
+            "Imported %d hours of price statistics for job %s",
+            len(buckets),
+            self.job_id,
+        )
+        self._completed = []
@@ -0,0 +1,145 @@
+"""
+What a coordinator keeps of each result, and how much memory that takes.
+
+Only the combined itineraries feed sensors, the index and searches. The
+one-way outbound/return lists are kept only when round trips are combined
+locally, and the tracker only needs its last few steps once their durations
+have been recorded. The item hashes of every section are always kept, since
+the result's version and deltas are negotiated with them. A result saved
+under one policy does not hold what another needs, so the policy is saved
+with it and a restored result is only negotiated against under the same one.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass, fields, is_dataclass, replace
+from itertools import chain
+from typing import TYPE_CHECKING, Any, overload
+
+from .const import TRACKER_MAX_STEPS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from .api_models import FlightSearchResult
+
+
+class SequenceView[T](Sequence[T]):
+    """Read-only view of one or more lists, without copying them."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, *parts: list[T]) -> None:
+        """Wrap the lists, which are read in order."""
+        self._parts = parts
+
+    def __len__(self) -> int:
+        """Return the number of items in all lists."""
+        return sum(map(len, self._parts))
+
+    def __iter__(self) -> Iterator[T]:
+        """Iterate over the lists at C speed."""
+        return chain.from_iterable(self._parts)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        """Return an item, or a list for a slice."""
+        if len(self._parts) == 1:
+            return self._parts[0][index]
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        for part in self._parts:
+            if 0 <= index < len(part):
+                return part[index]
+            index -= len(part)
+        msg = "view index out of range"
+        raise IndexError(msg)
+
+    def __repr__(self) -> str:
+        """Describe the view without listing its items."""
+        return f"<{type(self).__name__} of {len(self)} items>"
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    Which parts of a result a coordinator keeps.
+
+    Attributes:
+        one_way : bool
+            Keep the outbound and return lists.
+        tracker_steps : int
+            Number of most recent tracker steps kept.
+
+    """
+
+    one_way: bool = False
+    tracker_steps: int = TRACKER_MAX_STEPS
+
+    def apply(self, result: FlightSearchResult) -> FlightSearchResult:
+        """Return result without the parts this policy does not keep."""
+        changes: dict[str, Any] = {}
+        if not self.one_way and (result.outbound or result.return_):
+            changes["outbound"] = []
+            changes["return_"] = []
+        if len(result.tracker) > self.tracker_steps:
+            changes["tracker"] = result.tracker[-self.tracker_steps :]
+        return replace(result, **changes) if changes else result
+
+    def to_saved(self, result: FlightSearchResult) -> dict[str, Any]:
+        """Serialize a result kept under this policy, recording the policy."""
+        return {**result.to_dict(), "one_way": self.one_way}
+
+    def kept(self, saved: dict[str, Any]) -> bool:
+        """Tell whether a saved result was kept under this policy."""
+        return saved.get("one_way") == self.one_way
+
+
+def _deep_sizeof(obj: Any, seen: set[int]) -> int:
+    """Return the size of obj and everything it references not yet in seen."""
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, str | bytes | int | float | bool) or item is None:
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, list | tuple | set | frozenset):
+            stack.extend(item)
+        elif is_dataclass(item):
+            stack.extend(getattr(item, f.name) for f in fields(item))
+            if hasattr(item, "__dict__"):
+                size += sys.getsizeof(item.__dict__)
+        elif hasattr(item, "__dict__"):
+            stack.append(item.__dict__)
+    return size
+
+
+def retained_size(parts: Iterable[tuple[str, Any]]) -> dict[str, int]:
+    """
+    Estimate the bytes held by each named part, and their total.
+
+    Objects shared between parts (e.g. itineraries that are both in the
+    result and in an index) are counted once, in the first part that
+    references them. Airports, routes and legs are held as catalog ids, so
+    the shared catalog is not counted here.
+    """
+    seen: set[int] = set()
+    sizes = {name: _deep_sizeof(part, seen) for name, part in parts}
+    sizes["total"] = sum(sizes.values())
+    return sizes
@@ -0,0 +1,187 @@
+"""
+Filter, sort and limit queries over the itineraries of parsed results.
+
+Every itinerary of a result is reduced once to a SearchRow holding the values
+that can be filtered or sorted on. Rows are sorted by a key the first time a
+search asks for it, and kept until the result is replaced. A search then walks
+the rows of each job in order, merging the jobs, and stops as soon as it has
+enough matches.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from itertools import islice
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .api_models import minutes_of_day
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+    from datetime import time
+
+    from .api_models import ReturnFlight
+
+SORT_PRICE = "price"
+SORT_DURATION = "duration"
+SORT_DEPARTURE = "departure"
+SORT_LEGS = "legs"
+
+
+class SearchRow(NamedTuple):
+    """The searchable values of one itinerary."""
+
+    price: float
+    duration: float
+    legs: int
+    out_legs: int
+    ret_legs: int
+    # departure times of day, in minutes after midnight (airport local time)
+    out_minutes: int
+    ret_minutes: int
+    # epoch key of the outbound departure
+    departure: int
+    job_id: str
+    flight: ReturnFlight
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the compact form used in service responses."""
+        flight = self.flight
+        return {
+            "job_id": self.job_id,
+            "id": flight.id,
+            "price": self.price,
+            "currency": flight.price.currency,
+            "duration": self.duration,
+            "out_depart": flight.schedule.outbound.depart,
+            "out_arrive": flight.schedule.outbound.arrive,
+            "out_legs": flight.outbound_legs,
+            "ret_depart": flight.schedule.return_.depart,
+            "ret_arrive": flight.schedule.return_.arrive,
+            "ret_legs": flight.return_legs,
+        }
+
+
+# ties are broken by price, then by id so results are stable
+SORT_KEYS: dict[str, Callable[[SearchRow], Any]] = {
+    SORT_PRICE: attrgetter("price", "duration", "flight.id"),
+    SORT_DURATION: attrgetter("duration", "price", "flight.id"),
+    SORT_DEPARTURE: attrgetter("departure", "price", "flight.id"),
+    SORT_LEGS: attrgetter("legs", "price", "flight.id"),
+}
+
+
+def _row(job_id: str, flight: ReturnFlight) -> SearchRow:
+    """Reduce an itinerary to its searchable values."""
+    outbound, return_ = flight.schedule.outbound, flight.schedule.return_
+    out_legs = len(flight.outbound_leg_ids)
+    ret_legs = len(flight.return_leg_ids)
+    return SearchRow(
+        price=flight.price.total,
+        duration=flight.duration.total,
+        legs=out_legs + ret_legs,
+        out_legs=out_legs,
+        ret_legs=ret_legs,
+        out_minutes=minutes_of_day(outbound.depart_at),
+        ret_minutes=minutes_of_day(return_.depart_at),
+        departure=outbound.depart_key,
+        job_id=job_id,
+        flight=flight,
+    )
+
+
+class SearchTable:
+    """The search rows of one result, with their orderings built on demand."""
+
+    def __init__(self, job_id: str, flights: Iterable[ReturnFlight]) -> None:
+        """Build the rows of every itinerary."""
+        self.job_id = job_id
+        self.rows = [_row(job_id, flight) for flight in flights]
+        self._sorted: dict[str, list[SearchRow]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of itineraries."""
+        return len(self.rows)
+
+    def sorted_by(self, sort_by: str) -> list[SearchRow]:
+        """Return the rows in the order of a sort key, sorting them only once."""
+        rows = self._sorted.get(sort_by)
+        if rows is None:
+            rows = self._sorted[sort_by] = sorted(self.rows, key=SORT_KEYS[sort_by])
+        return rows
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Conditions an itinerary must meet; None leaves a condition out.
+
+    Attributes:
+        max_price : float | None
+            Highest total price.
+        max_duration : float | None
+            Longest total duration, in hours.
+        max_legs : int | None
+            Most legs in each direction.
+        out_after, out_before : time | None
+            Outbound departure time of day window (inclusive).
+        ret_after, ret_before : time | None
+            Return departure time of day window (inclusive).
+
+    """
+
+    max_price: float | None = None
+    max_duration: float | None = None
+    max_legs: int | None = None
+    out_after: time | None = None
+    out_before: time | None = None
+    ret_after: time | None = None
+    ret_before: time | None = None
+
+    def predicate(self) -> Callable[[SearchRow], bool]:
+        """Compile the conditions into a single row test."""
+        tests: list[Callable[[SearchRow], bool]] = []
+        if self.max_price is not None:
+            max_price = self.max_price
+            tests.append(lambda row: row.price <= max_price)
+        if self.max_duration is not None:
+            max_duration = self.max_duration
+            tests.append(lambda row: row.duration <= max_duration)
+        if self.max_legs is not None:
+            max_legs = self.max_legs
+            tests.append(
+                lambda row: row.out_legs <= max_legs and row.ret_legs <= max_legs
+            )
+        for field, after, before in (
+            ("out_minutes", self.out_after, self.out_before),
+            ("ret_minutes", self.ret_after, self.ret_before),
+        ):
+            low = after.hour * 60 + after.minute if after is not None else 0
+            high = before.hour * 60 + before.minute if before is not None else 24 * 60
+            if after is not None or before is not None:
+                minutes = attrgetter(field)
+                tests.append(lambda row, m=minutes, lo=low, hi=high: lo <= m(row) <= hi)
+        return lambda row: all(test(row) for test in tests)
+
+
+def search(
+    tables: Sequence[SearchTable],
+    conditions: SearchFilter,
+    sort_by: str = SORT_PRICE,
+    limit: int = 20,
+) -> tuple[list[SearchRow], bool]:
+    """
+    Return the first limit matching itineraries across tables, in order.
+
+    Returns:
+        tuple[list[SearchRow], bool]: The matching rows, and whether more
+        itineraries matched than were returned.
+
+    """
+    ordered: Iterator[SearchRow] = heapq.merge(
+        *(table.sorted_by(sort_by) for table in tables), key=SORT_KEYS[sort_by]
+    )
+    matches = list(islice(filter(conditions.predicate(), ordered), limit + 1))
+    return matches[:limit], len(matches) > limit
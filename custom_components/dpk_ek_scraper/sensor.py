@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorStateClass,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from custom_components.dpk_ek_scraper.const import (
@@ -18,6 +21,7 @@ from custom_components.dpk_ek_scraper.const import (
     ATTR_DESTINATION,
     ATTR_DESTINATION_NAME,
     ATTR_DURATION,
+    ATTR_FRONTIER,
     ATTR_LEGS,
     ATTR_ORIGIN,
     ATTR_ORIGIN_NAME,
@@ -33,9 +37,15 @@ from custom_components.dpk_ek_scraper.const import (
     ATTR_RET_LEGS,
     ATTR_RET_PRICE,
     ATTR_RETURN,
+    ATTR_TREND,
     ATTRIBUTION,
     DOMAIN,
+    METRIC_ENTITY_DISCOVERY,
+    METRIC_STATE_WRITES,
+    METRIC_UNITS,
 )
+from custom_components.dpk_ek_scraper.index import BY_DURATION, BY_PRICE
+from custom_components.dpk_ek_scraper.pareto import point
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
@@ -45,6 +55,8 @@ if TYPE_CHECKING:
 
     from .coordinator import ScraperDataUpdateCoordinator
     from .data import ScraperConfigEntry
+    from .index import FlightIndex
+    from .metrics import RollingHistogram
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -85,19 +97,29 @@ async def async_setup_entry(
     """Set up the sensor platform with dynamic entity creation."""
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
     added_ids: set[str] = set()
+    added_steps: set[str] = set()
 
     def _update_entities() -> None:
-        """Check for new flights and add sensors dynamically."""
-        new_entities = []
-        # Fetch the current flights from coordinator
-        flights = coordinator.return_flights
-        _LOGGER.debug("Coordinator reports %d return flights", len(flights))
-
-        for flight in flights:
-            if flight.id not in added_ids:
-                _LOGGER.debug("Discovered new flight id=%s, creating sensor", flight.id)
-                new_entities.append(ScraperReturnSensor(coordinator, flight))
-                added_ids.add(flight.id)
+        """Check for new flights and pipeline steps and add sensors dynamically."""
+        new_entities: list[SensorEntity] = []
+        with coordinator.metrics.timer(METRIC_ENTITY_DISCOVERY):
+            # Fetch the current flights from coordinator
+            flights = coordinator.return_flights
+            _LOGGER.debug("Coordinator reports %d return flights", len(flights))
+
+            for flight in flights:
+                if flight.id not in added_ids:
+                    _LOGGER.debug(
+                        "Discovered new flight id=%s, creating sensor", flight.id
+                    )
+                    new_entities.append(ScraperReturnSensor(coordinator, flight))
+                    added_ids.add(flight.id)
+
+            for step in coordinator.timings.histograms:
+                if step not in added_steps:
+                    _LOGGER.debug("Discovered pipeline step %s, creating sensor", step)
+                    new_entities.append(ScraperTimingSensor(coordinator, step))
+                    added_steps.add(step)
 
         if new_entities:
             _LOGGER.debug("Adding %d new sensor entities", len(new_entities))
@@ -105,6 +127,20 @@ async def async_setup_entry(
         else:
             _LOGGER.debug("No new sensor entities to add")
 
+    # Client-side metric sensors are fixed, and disabled until a user opts in
+    async_add_entities(
+        ScraperMetricSensor(coordinator, metric) for metric in METRIC_UNITS
+    )
+
+    # The best flights across this entry's group, from the domain-wide index
+    async_add_entities(
+        ScraperGroupBestSensor(coordinator, by) for by in (BY_PRICE, BY_DURATION)
+    )
+
+    async_add_entities(
+        [ScraperFrontierSensor(coordinator), ScraperTrendSensor(coordinator)]
+    )
+
     # Add any initial flights at startup
     _update_entities()
 
@@ -112,11 +148,22 @@ async def async_setup_entry(
     coordinator.async_add_listener(_update_entities)
 
 
-class ScraperSensor(CoordinatorEntity, SensorEntity):
-    """Scraper Sensor class."""
+class ScraperBaseSensor(CoordinatorEntity, SensorEntity):
+    """Base class for scraper sensors, counting state writes per update."""
 
     _attr_should_poll = False
     _attr_attribution = ATTRIBUTION
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state, counting it in the coordinator's metrics."""
+        self.coordinator.metrics.incr(METRIC_STATE_WRITES)
+        self.async_write_ha_state()
+
+
+class ScraperSensor(ScraperBaseSensor):
+    """Scraper Sensor class."""
+
     _attr_icon = "mdi:airplane"
 
     def __init__(
@@ -143,7 +190,7 @@ class ScraperSensor(CoordinatorEntity, SensorEntity):
     async def async_added_to_hass(self) -> None:
         """Connect to dispatcher listening for entity data notifications."""
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
     async def async_update(self) -> None:
@@ -180,12 +227,25 @@ class ScraperSensor(CoordinatorEntity, SensorEntity):
         }
 
 
-class ScraperReturnSensor(CoordinatorEntity, SensorEntity):
+class ScraperReturnSensor(ScraperBaseSensor):
     """Scraper Sensor class."""
 
-    _attr_should_poll = False
-    _attr_attribution = ATTRIBUTION
     _attr_icon = "mdi:airplane"
+    # volatile or bulky details are kept on the state but not in the recorder
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_OUT_DEPART,
+            ATTR_OUT_ARRIVE,
+            ATTR_OUT_PRICE,
+            ATTR_OUT_LEGS,
+            ATTR_RET_DEPART,
+            ATTR_RET_ARRIVE,
+            ATTR_RET_PRICE,
+            ATTR_RET_LEGS,
+            ATTR_LEGS,
+            ATTR_TREND,
+        }
+    )
 
     def __init__(
         self,
@@ -202,6 +262,13 @@ class ScraperReturnSensor(CoordinatorEntity, SensorEntity):
         self._attr_device_class = SensorDeviceClass.MONETARY  # special class for money
         self._attr_native_unit_of_measurement = flight.price.currency
         self._attr_state_class = "total"
+        self._attr_native_value = flight.price.total
+        self._flight_version = coordinator.flight_version(flight.id)
+        # (version, availability) last handled, to skip unchanged updates
+        self._seen: tuple[str | None, bool] | None = None
+        # attributes are built once per flight version (its content hash)
+        self._attributes: dict[str, Any] | None = None
+        self._attributes_version: str | None = None
 
     @property
     def available(self) -> bool:
@@ -211,32 +278,79 @@ class ScraperReturnSensor(CoordinatorEntity, SensorEntity):
     async def async_added_to_hass(self) -> None:
         """Connect to dispatcher listening for entity data notifications."""
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
     async def async_update(self) -> None:
         """Get the latest data from OWM and updates the states."""
         await self.coordinator.async_request_refresh()
 
-    @property
-    def native_value(self) -> float | None:
-        """Return the current price of the flight."""
-        if self.coordinator.data and hasattr(self.coordinator.data, "return_flights"):
-            flight = next(
-                (
-                    f
-                    for f in self.coordinator.data.return_flights
-                    if f.id == self.flight.id
-                ),
-                None,
-            )
-            return flight.price.total if flight else None
-        return None
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """
+        Follow the flight into the latest result before writing state.
+
+        Nothing is written when neither the flight's version nor the
+        availability changed, so a result only touches the flights it changed.
+        """
+        flight = self.coordinator.get_return_flight(self.flight.id)
+        version = self.coordinator.flight_version(flight.id) if flight else None
+        seen = (version, self.available)
+        # without a content hash a changed flight cannot be told apart
+        if seen == self._seen and (flight is None or version is not None):
+            return
+        self._seen = seen
+        if flight is None:
+            self._attr_native_value = None
+        elif self._is_meaningful_change(flight):
+            self.flight = flight
+            self._flight_version = self.coordinator.flight_version(flight.id)
+            self._attr_native_value = flight.price.total
+        super()._handle_coordinator_update()
+
+    def _is_meaningful_change(self, flight: ReturnFlight) -> bool:
+        """
+        Tell whether a new version of the flight should be published.
+
+        Price moves within the configured deadband are held back, so repeated
+        scrapes do not produce a new recorder row, unless something other
+        than the prices changed.
+        """
+        if self._attr_native_value is None or flight is self.flight:
+            return True
+        deadband = self.coordinator.api.config.price_deadband
+        if abs(flight.price.total - self._attr_native_value) > deadband:
+            return True
+        current = self.flight
+        return (
+            flight.schedule != current.schedule
+            or flight.duration != current.duration
+            or flight.outbound_leg_ids != current.outbound_leg_ids
+            or flight.return_leg_ids != current.return_leg_ids
+        )
 
     @property
     def extra_state_attributes(self) -> dict:
-        """Return extra properties about this flight."""
-        return {
+        """
+        Return extra properties about this flight, cached per flight version.
+
+        The price trend is taken when a new version of the flight is
+        published, so price moves held back by the deadband leave the
+        attributes, and thus the recorded state, untouched.
+        """
+        version = self._flight_version
+        if (
+            self._attributes is None
+            or version is None
+            or version != self._attributes_version
+        ):
+            self._attributes = self._build_attributes()
+            self._attributes_version = version
+        return self._attributes
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Build the attributes of the current flight, with its price trend."""
+        attributes = {
             ATTR_OUTBOUND: self.flight.schedule.outbound.airport,
             ATTR_OUT_DEPART: self.flight.schedule.outbound.depart,
             ATTR_OUT_ARRIVE: self.flight.schedule.outbound.arrive,
@@ -250,5 +364,204 @@ class ScraperReturnSensor(CoordinatorEntity, SensorEntity):
             ATTR_RET_PRICE: self.flight.price.return_,
             ATTR_RET_LEGS: self.flight.return_legs,
             ATTR_DURATION: self.flight.duration.total,
-            ATTR_LEGS: list(self.flight.outbound_legs) + list(self.flight.return_legs),
+            ATTR_LEGS: self.flight.outbound_legs + self.flight.return_legs,
+        }
+        trend = self.coordinator.trends.flights.get(self.flight.id)
+        if trend is not None:
+            attributes[ATTR_TREND] = trend.attributes(time.time())
+        return attributes
+
+
+class ScraperFrontierSensor(ScraperBaseSensor):
+    """Number of non-dominated itineraries, listing them as an attribute."""
+
+    _attr_icon = "mdi:chart-scatter-plot"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _unrecorded_attributes = frozenset({ATTR_FRONTIER})
+
+    def __init__(
+        self,
+        coordinator: Any,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator)
+        self.coordinator: ScraperDataUpdateCoordinator = coordinator
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.job_id}_frontier"
+        self._attr_name = f"Pareto frontier {coordinator.job_id}"
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the number of itineraries on the frontier."""
+        return len(self.coordinator.frontier) if self.coordinator.data else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the frontier as [id, price, duration, legs] rows, cheapest first."""
+        return {
+            ATTR_FRONTIER: [
+                [flight.id, *point(flight)] for flight in self.coordinator.frontier
+            ]
+        }
+
+
+class ScraperTrendSensor(ScraperBaseSensor):
+    """Smoothed cheapest price of the job, with its trend indicators."""
+
+    _attr_icon = "mdi:chart-line"
+    _attr_device_class = SensorDeviceClass.MONETARY
+
+    def __init__(
+        self,
+        coordinator: Any,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator)
+        self.coordinator: ScraperDataUpdateCoordinator = coordinator
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.job_id}_trend"
+        self._attr_name = f"Price trend {coordinator.job_id}"
+        self._attr_state_class = "total"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the EWMA of the cheapest price."""
+        trend = self.coordinator.trends.job
+        return round(trend.ewma, 2) if trend else None
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the currency of the current result."""
+        flights = self.coordinator.return_flights
+        return flights[0].price.currency if flights else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the trend indicators of the cheapest price."""
+        trend = self.coordinator.trends.job
+        return trend.attributes(time.time()) if trend else {}
+
+
+class ScraperTimingSensor(ScraperBaseSensor):
+    """Diagnostic sensor with the median duration of one scraper pipeline step."""
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: Any,
+        step: str,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator)
+        self.coordinator: ScraperDataUpdateCoordinator = coordinator
+        self.step = step
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.job_id}_timing_{step}"
+        self._attr_name = f"Scrape {step} time {coordinator.job_id}"
+
+    def _histogram(self) -> RollingHistogram | None:
+        """Return the histogram this sensor reports on."""
+        return self.coordinator.timings.histograms.get(self.step)
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the p50 of the histogram."""
+        histogram = self._histogram()
+        return histogram.percentile(50) if histogram else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the p95, max and sample count of the histogram."""
+        histogram = self._histogram()
+        return histogram.summary() if histogram else {}
+
+
+class ScraperMetricSensor(ScraperTimingSensor):
+    """Optional diagnostic sensor for one of the integration's own metrics."""
+
+    _attr_icon = "mdi:speedometer"
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: Any,
+        metric: str,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, metric)
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.job_id}_metric_{metric}"
+        self._attr_name = f"Integration {metric} {coordinator.job_id}"
+        if METRIC_UNITS[metric] is None:
+            # a count, not a duration
+            self._attr_device_class = None
+            self._attr_native_unit_of_measurement = None
+
+    def _histogram(self) -> RollingHistogram | None:
+        """Return the histogram this sensor reports on."""
+        return self.coordinator.metrics.histograms.get(self.step)
+
+
+class ScraperGroupBestSensor(SensorEntity):
+    """The cheapest or fastest itinerary across the entries of a group."""
+
+    _attr_should_poll = False
+    _attr_attribution = ATTRIBUTION
+
+    def __init__(
+        self,
+        coordinator: Any,
+        by: str,
+    ) -> None:
+        """Initialize the sensor class."""
+        self.coordinator: ScraperDataUpdateCoordinator = coordinator
+        self.index: FlightIndex = coordinator.index
+        self.group = coordinator.group
+        self.by = by
+        label = "cheapest" if by == BY_PRICE else "fastest"
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.job_id}_group_{by}"
+        self._attr_name = f"Group {label} {coordinator.job_id}"
+        if by == BY_PRICE:
+            self._attr_icon = "mdi:cash-multiple"
+            self._attr_device_class = SensorDeviceClass.MONETARY
+            self._attr_state_class = "total"
+        else:
+            self._attr_icon = "mdi:timer-sand"
+            self._attr_device_class = SensorDeviceClass.DURATION
+            self._attr_native_unit_of_measurement = UnitOfTime.HOURS
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._update_from_index()
+
+    async def async_added_to_hass(self) -> None:
+        """Follow changes to the group in the index."""
+        self.async_on_remove(
+            self.index.async_add_listener(self.group, self._handle_index_update)
+        )
+
+    @callback
+    def _handle_index_update(self) -> None:
+        """Write the state when the group's best flight changed."""
+        before = (self._attr_native_value, self._attr_extra_state_attributes)
+        self._update_from_index()
+        if (self._attr_native_value, self._attr_extra_state_attributes) == before:
+            return
+        self.coordinator.metrics.incr(METRIC_STATE_WRITES)
+        self.async_write_ha_state()
+
+    def _update_from_index(self) -> None:
+        """Take the group's best flight from the index."""
+        best = self.index.best(self.group, self.by)
+        if best is None:
+            self._attr_native_value = None
+            self._attr_extra_state_attributes = {"group": self.group}
+            return
+        if self.by == BY_PRICE:
+            self._attr_native_value = best.flight.price.total
+            self._attr_native_unit_of_measurement = best.flight.price.currency
+        else:
+            self._attr_native_value = best.flight.duration.total
+        self._attr_extra_state_attributes = {
+            **best.to_dict(),
+            "entries": len(self.index.members(self.group)),
         }
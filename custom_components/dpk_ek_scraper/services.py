@@ -0,0 +1,248 @@
+"""Services for the scraper integration."""
+
+from __future__ import annotations
+
+import logging
+import time
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DEPART_FROM,
+    ATTR_DEPART_TO,
+    ATTR_DESTINATION,
+    ATTR_FILENAME,
+    ATTR_FORMAT,
+    ATTR_GROUP,
+    ATTR_INCLUDE_HISTORY,
+    ATTR_LIMIT,
+    ATTR_MAX_DURATION,
+    ATTR_MAX_LEGS,
+    ATTR_MAX_PRICE,
+    ATTR_ORIGIN,
+    ATTR_OUT_AFTER,
+    ATTR_OUT_BEFORE,
+    ATTR_OVERWRITE,
+    ATTR_RET_AFTER,
+    ATTR_RET_BEFORE,
+    ATTR_SORT_BY,
+    ATTR_TICKET_CLASS,
+    DATA_INDEX,
+    DOMAIN,
+    EXPORT_DIR,
+    SERVICE_BEST_FLIGHTS,
+    SERVICE_EXPORT_RESULTS,
+    SERVICE_SEARCH_FLIGHTS,
+)
+from .export import FORMAT_NDJSON, FORMAT_PARQUET, FORMATS, export, parquet_available
+from .index import BY_DURATION, BY_PRICE
+from .search import SORT_KEYS, SORT_PRICE, SearchFilter, SearchTable, search
+
+if TYPE_CHECKING:
+    from .coordinator import ScraperDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+SEARCH_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_GROUP): cv.string,
+        vol.Optional(ATTR_MAX_PRICE): vol.Coerce(float),
+        vol.Optional(ATTR_MAX_DURATION): vol.Coerce(float),
+        vol.Optional(ATTR_MAX_LEGS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_OUT_AFTER): cv.time,
+        vol.Optional(ATTR_OUT_BEFORE): cv.time,
+        vol.Optional(ATTR_RET_AFTER): cv.time,
+        vol.Optional(ATTR_RET_BEFORE): cv.time,
+        vol.Optional(ATTR_SORT_BY, default=SORT_PRICE): vol.In(list(SORT_KEYS)),
+        vol.Optional(ATTR_LIMIT, default=20): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=500)
+        ),
+    }
+)
+
+BEST_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_GROUP): cv.string,
+        vol.Optional(ATTR_ORIGIN): cv.string,
+        vol.Optional(ATTR_DESTINATION): cv.string,
+        vol.Optional(ATTR_TICKET_CLASS): cv.string,
+        vol.Optional(ATTR_DEPART_FROM): cv.date,
+        vol.Optional(ATTR_DEPART_TO): cv.date,
+        vol.Optional(ATTR_SORT_BY, default=BY_PRICE): vol.In([BY_PRICE, BY_DURATION]),
+    }
+)
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_FORMAT, default=FORMAT_NDJSON): vol.In(FORMATS),
+        # a plain file name: exports always land in EXPORT_DIR
+        vol.Optional(ATTR_FILENAME): vol.All(
+            cv.string, vol.Match(r"^[\w-][\w.-]*$", msg="not a plain file name")
+        ),
+        vol.Optional(ATTR_INCLUDE_HISTORY, default=True): cv.boolean,
+        vol.Optional(ATTR_OVERWRITE, default=False): cv.boolean,
+    }
+)
+
+
+@callback
+def _coordinators(
+    hass: HomeAssistant, entry_ids: list[str] | None, group: str | None
+) -> list[ScraperDataUpdateCoordinator]:
+    """Return the coordinators of the loaded entries a search covers."""
+    coordinators = []
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry_ids is not None and entry.entry_id not in entry_ids:
+            continue
+        data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+        if data is None:
+            continue
+        coordinator = data["coordinator"]
+        if group is None or coordinator.group == group:
+            coordinators.append(coordinator)
+    return coordinators
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    @callback
+    def search_flights(call: ServiceCall) -> ServiceResponse:
+        """Search the itineraries of the current results."""
+        start = time.perf_counter()
+        tables: list[SearchTable] = [
+            table
+            for coordinator in _coordinators(
+                hass, call.data.get(ATTR_CONFIG_ENTRY_ID), call.data.get(ATTR_GROUP)
+            )
+            if (table := coordinator.search_table()) is not None
+        ]
+        rows, truncated = search(
+            tables,
+            SearchFilter(
+                max_price=call.data.get(ATTR_MAX_PRICE),
+                max_duration=call.data.get(ATTR_MAX_DURATION),
+                max_legs=call.data.get(ATTR_MAX_LEGS),
+                out_after=call.data.get(ATTR_OUT_AFTER),
+                out_before=call.data.get(ATTR_OUT_BEFORE),
+                ret_after=call.data.get(ATTR_RET_AFTER),
+                ret_before=call.data.get(ATTR_RET_BEFORE),
+            ),
+            call.data[ATTR_SORT_BY],
+            call.data[ATTR_LIMIT],
+        )
+        _LOGGER.debug(
+            "search_flights over %d jobs returned %d rows in %.3f ms",
+            len(tables),
+            len(rows),
+            (time.perf_counter() - start) * 1000,
+        )
+        return {
+            "flights": [row.to_dict() for row in rows],
+            "searched": sum(len(table) for table in tables),
+            "truncated": truncated,
+        }
+
+    @callback
+    def best_flights(call: ServiceCall) -> ServiceResponse:
+        """Return the best itinerary of every matching job, from the index."""
+        index = hass.data.get(DOMAIN, {}).get(DATA_INDEX)
+        if index is None:
+            return {"flights": []}
+        depart_from = call.data.get(ATTR_DEPART_FROM)
+        depart_to = call.data.get(ATTR_DEPART_TO)
+        matches = index.query(
+            call.data[ATTR_SORT_BY],
+            group=call.data.get(ATTR_GROUP),
+            origin=call.data.get(ATTR_ORIGIN),
+            destination=call.data.get(ATTR_DESTINATION),
+            ticket_class=call.data.get(ATTR_TICKET_CLASS),
+            depart_from=depart_from.isoformat() if depart_from else None,
+            depart_to=depart_to.isoformat() if depart_to else None,
+        )
+        return {"flights": [indexed.to_dict() for indexed in matches]}
+
+    async def export_results(call: ServiceCall) -> ServiceResponse:
+        """Write the current results, and their history, to a file."""
+        start = time.perf_counter()
+        file_format = call.data[ATTR_FORMAT]
+        if file_format == FORMAT_PARQUET and not await hass.async_add_executor_job(
+            parquet_available
+        ):
+            msg = "Parquet export needs pyarrow, which is not installed"
+            raise ServiceValidationError(msg)
+        # the extension always matches the format
+        stem = call.data.get(ATTR_FILENAME, "").removesuffix(f".{file_format}")
+        stem = stem or f"{DOMAIN}_{dt_util.utcnow():%Y%m%d_%H%M%S}"
+        path = Path(hass.config.path(EXPORT_DIR, f"{stem}.{file_format}"))
+        include_history = call.data[ATTR_INCLUDE_HISTORY]
+        jobs = [
+            (
+                coordinator.job_id,
+                coordinator.data,
+                coordinator.trends.snapshot() if include_history else [],
+            )
+            for coordinator in _coordinators(
+                hass, call.data.get(ATTR_CONFIG_ENTRY_ID), None
+            )
+        ]
+        try:
+            rows = await hass.async_add_executor_job(
+                partial(
+                    export,
+                    path,
+                    file_format,
+                    jobs,
+                    overwrite=call.data[ATTR_OVERWRITE],
+                )
+            )
+        except FileExistsError as err:
+            msg = f"{path.name} already exists; set overwrite to replace it"
+            raise ServiceValidationError(msg) from err
+        _LOGGER.debug(
+            "export_results wrote %d rows of %d jobs to %s in %.3f ms",
+            rows,
+            len(jobs),
+            path,
+            (time.perf_counter() - start) * 1000,
+        )
+        return {"path": str(path), "format": file_format, "rows": rows}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BEST_FLIGHTS,
+        best_flights,
+        schema=BEST_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_RESULTS,
+        export_results,
+        schema=EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEARCH_FLIGHTS,
+        search_flights,
+        schema=SEARCH_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,197 @@
+"""
+Price trend indicators per itinerary and per job, kept up to date as results arrive.
+
+Each price seen moves an exponentially weighted moving average, the min/max of
+its day bucket and, if it is lower than the previous price, the time of the
+last drop. Only the last window days of buckets are kept, so an update costs
+O(1) and the rolling min/max reads at most window buckets. Trackers are plain
+data so they can be saved with a Store and restored after a restart.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    ATTR_CHANGE_PCT,
+    ATTR_DAYS_SINCE_DROP,
+    ATTR_EWMA,
+    ATTR_FIRST_SEEN,
+    ATTR_ROLLING_MAX,
+    ATTR_ROLLING_MIN,
+    TREND_ALPHA,
+    TREND_WINDOW_DAYS,
+)
+
+if TYPE_CHECKING:
+    from .api_models import FlightSearchResult
+
+SECONDS_PER_DAY = 86400
+
+
+@dataclass(slots=True)
+class Trend:
+    """
+    Trend indicators of one price series.
+
+    Attributes:
+        first_seen : float
+            Epoch seconds of the first price.
+        first_price : float
+            The first price.
+        ewma : float
+            Exponentially weighted moving average of the prices.
+        last_price : float
+            The latest price.
+        last_seen : float
+            Epoch seconds of the latest price.
+        last_drop : float | None
+            Epoch seconds of the last time the price went down.
+        days : deque[list[float]]
+            [day number, min, max] of each day with prices, oldest first.
+
+    """
+
+    first_seen: float
+    first_price: float
+    ewma: float
+    last_price: float
+    last_seen: float
+    last_drop: float | None = None
+    days: deque[list[float]] = field(default_factory=deque)
+
+    @classmethod
+    def start(cls, price: float, now: float) -> Trend:
+        """Start a series at its first price."""
+        return cls(
+            now,
+            price,
+            price,
+            price,
+            now,
+            None,
+            deque([[now // SECONDS_PER_DAY, price, price]]),
+        )
+
+    def update(self, price: float, now: float, alpha: float, window_days: int) -> None:
+        """Fold in a new price."""
+        self.ewma += alpha * (price - self.ewma)
+        if price < self.last_price:
+            self.last_drop = now
+        self.last_price = price
+        self.last_seen = now
+        day = now // SECONDS_PER_DAY
+        days = self.days
+        if days and days[-1][0] == day:
+            bucket = days[-1]
+            bucket[1] = min(bucket[1], price)
+            bucket[2] = max(bucket[2], price)
+        else:
+            days.append([day, price, price])
+        while days[0][0] <= day - window_days:
+            days.popleft()
+
+    def attributes(self, now: float) -> dict[str, Any]:
+        """Return the indicators as state attributes."""
+        change = None
+        if self.first_price:
+            change = round((self.last_price / self.first_price - 1) * 100, 2)
+        since_drop = None
+        if self.last_drop is not None:
+            since_drop = round((now - self.last_drop) / SECONDS_PER_DAY, 1)
+        return {
+            ATTR_EWMA: round(self.ewma, 2),
+            ATTR_ROLLING_MIN: min(bucket[1] for bucket in self.days),
+            ATTR_ROLLING_MAX: max(bucket[2] for bucket in self.days),
+            ATTR_CHANGE_PCT: change,
+            ATTR_DAYS_SINCE_DROP: since_drop,
+            ATTR_FIRST_SEEN: datetime.fromtimestamp(self.first_seen, UTC).isoformat(),
+        }
+
+    def to_list(self) -> list[Any]:
+        """Return a compact serializable form."""
+        return [
+            self.first_seen,
+            self.first_price,
+            self.ewma,
+            self.last_price,
+            self.last_seen,
+            self.last_drop,
+            list(self.days),
+        ]
+
+    @classmethod
+    def from_list(cls, data: list[Any]) -> Trend:
+        """Rebuild a series saved with to_list."""
+        *values, days = data
+        return cls(*values, days=deque(days))
+
+
+class TrendTracker:
+    """The trends of every itinerary of a job, and of its cheapest price."""
+
+    def __init__(
+        self, alpha: float = TREND_ALPHA, window_days: int = TREND_WINDOW_DAYS
+    ) -> None:
+        """Initialise an empty tracker."""
+        self.alpha = alpha
+        self.window_days = window_days
+        self.flights: dict[str, Trend] = {}
+        self.job: Trend | None = None
+
+    def update(self, result: FlightSearchResult, now: float) -> None:
+        """
+        Fold in the prices of a result.
+
+        Itineraries not offered for longer than the window are forgotten.
+        """
+        flights = self.flights
+        alpha, window = self.alpha, self.window_days
+        cheapest = None
+        for flight in result.return_flights:
+            price = flight.price.total
+            if cheapest is None or price < cheapest:
+                cheapest = price
+            trend = flights.get(flight.id)
+            if trend is None:
+                flights[flight.id] = Trend.start(price, now)
+            else:
+                trend.update(price, now, alpha, window)
+        if cheapest is not None:
+            if self.job is None:
+                self.job = Trend.start(cheapest, now)
+            else:
+                self.job.update(cheapest, now, alpha, window)
+        stale = now - window * SECONDS_PER_DAY
+        for flight_id in [i for i, t in flights.items() if t.last_seen < stale]:
+            del flights[flight_id]
+
+    def snapshot(self) -> list[tuple[str, tuple[list[float], ...]]]:
+        """
+        Copy the day buckets of every series, the job's first (with id '').
+
+        Taken on the event loop, the copy can be read from another thread.
+        """
+        series = [("", self.job)] if self.job else []
+        series.extend(self.flights.items())
+        return [
+            (series_id, tuple(list(bucket) for bucket in trend.days))
+            for series_id, trend in series
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a serializable form, for a Store."""
+        return {
+            "job": self.job.to_list() if self.job else None,
+            "flights": {i: t.to_list() for i, t in self.flights.items()},
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Load the series saved with to_dict."""
+        self.job = Trend.from_list(data["job"]) if data.get("job") else None
+        self.flights = {
+            i: Trend.from_list(t) for i, t in data.get("flights", {}).items()
+        }
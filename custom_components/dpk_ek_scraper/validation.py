@@ -0,0 +1,67 @@
+"""
+Cheap checks of a webhook payload's envelope before any model is built.
+
+The schema is compiled once at import. It looks at the top-level keys, the
+types of the sections and, for deltas, that upserts are objects and deletes
+are ids, but never at the fields of an itinerary. A foreign or malformed
+payload is turned away before any model is built, rather than after a full
+parse.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from .api_models import REASON_ENVELOPE, REASON_FOREIGN, SECTIONS, PayloadError
+
+# items are only checked to be objects (upserts) and ids (deletes) here; the
+# models check the fields of upserted items as they are built
+_DELTA_SECTION = vol.Schema(
+    {vol.Optional("upsert"): [dict], vol.Optional("delete"): [str]},
+    extra=vol.ALLOW_EXTRA,
+)
+
+ENVELOPE_SCHEMA = vol.Schema(
+    {
+        vol.Required("job_id"): str,
+        vol.Optional("result"): int,
+        vol.Optional("outbound"): list,
+        vol.Optional("return"): list,
+        vol.Optional("combined"): list,
+        vol.Optional("tracker"): list,
+        # the version of the result we hold, when the scraper found no change
+        vol.Optional("unchanged"): str,
+        vol.Optional("delta"): vol.Schema(
+            {
+                vol.Required("base_version"): str,
+                **{vol.Optional(section): _DELTA_SECTION for section in SECTIONS},
+            },
+            extra=vol.ALLOW_EXTRA,
+        ),
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+def validate_envelope(payload: Any, job_id: str) -> None:
+    """
+    Check that payload is a result document for job_id.
+
+    Args:
+        payload (Any): The decoded webhook body.
+        job_id (str): The job the webhook belongs to.
+
+    Raises:
+        PayloadError: With the path of the first offending field.
+
+    """
+    try:
+        ENVELOPE_SCHEMA(payload)
+    except vol.Invalid as err:
+        path = "/".join(str(part) for part in err.path) or "(payload)"
+        raise PayloadError(REASON_ENVELOPE, path, err.msg) from err
+    if payload["job_id"] != job_id:
+        msg = f"{payload['job_id']!r} is not this entry's job {job_id!r}"
+        raise PayloadError(REASON_FOREIGN, "job_id", msg)
@@ -0,0 +1,90 @@
+"""
+Benchmark local round-trip combination against parsing the combined section.
+
+For each payload size, compares receiving the scraper's full document (with
+'combined') to receiving only the one-way lists and building the round trips
+with the integration's combine engine, keeping the cheapest --top-k or all of
+them. Reports body size, best-of-N time (JSON decode included) and the peak
+traced memory of one run.
+
+Usage (from the repository root):
+
+    PYTHONPATH=. python scripts/bench_combine.py --top-k 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from payloads import generate
+
+from custom_components.dpk_ek_scraper.api_models import FlightSearchResult
+from custom_components.dpk_ek_scraper.combine import CombineLimits, combine_result
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+SIZES = (100, 1000, 10000, 50000)
+
+
+def _measure(func: Callable[[], Any], rounds: int) -> tuple[float, int]:
+    """Return the best time over rounds, and the peak memory of one run."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=200)
+    parser.add_argument("--min-stay", type=float, default=0.0, help="hours")
+    parser.add_argument("--max-size", type=int, default=max(SIZES))
+    args = parser.parse_args()
+
+    print(f"{'case':>22} {'items':>7} {'body KiB':>9} {'ms':>10} {'peak KiB':>10}")
+    for size in (s for s in SIZES if s <= args.max_size):
+        doc = generate(size)
+        full = json.dumps(doc).encode()
+        one_way = json.dumps({k: v for k, v in doc.items() if k != "combined"}).encode()
+        cases: dict[str, tuple[bytes, Callable[[], Any]]] = {
+            "parse combined": (
+                full,
+                lambda full=full: FlightSearchResult.from_dict(json.loads(full)),
+            ),
+        }
+        for label, top_k in (
+            (f"combine top {args.top_k}", args.top_k),
+            ("combine all", size),
+        ):
+            limits = CombineLimits(top_k=top_k, min_stay=timedelta(hours=args.min_stay))
+            cases[label] = (
+                one_way,
+                lambda body=one_way, limits=limits: combine_result(
+                    FlightSearchResult.from_dict(json.loads(body)), limits
+                ),
+            )
+        rounds = args.rounds if size < 10000 else max(args.rounds // 2, 1)  # noqa: PLR2004
+        for name, (body, func) in cases.items():
+            seconds, peak = _measure(func, rounds)
+            print(
+                f"{name:>22} {size:>7} {len(body) / 1024:>9.0f} "
+                f"{seconds * 1000:>10.2f} {peak / 1024:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
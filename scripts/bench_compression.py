@@ -0,0 +1,82 @@
+"""
+Benchmark transfer plus decode time of result bodies per content encoding.
+
+Transfer time is modelled from the encoded size and a link bandwidth, decode
+time is measured by running the body through the integration's streaming
+reader and JSON parser.
+
+Usage (from the repository root, with the dev requirements installed):
+
+    PYTHONPATH=. python scripts/bench_compression.py --mbit 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.util.json import json_loads
+from payloads import generate
+
+from custom_components.dpk_ek_scraper.compression import (
+    CHUNK_SIZE,
+    async_read_body,
+    compress,
+    zstandard,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+SIZES = (10, 100, 1000, 10000)
+ROUNDS = 5
+
+
+async def _chunks(body: bytes) -> AsyncIterator[bytes]:
+    """Yield a body the way aiohttp's StreamReader.iter_chunked does."""
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start : start + CHUNK_SIZE]
+
+
+async def _decode_seconds(body: bytes) -> float:
+    """Return the best of ROUNDS decode times for a body."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        json_loads(await async_read_body(_chunks(body)))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main() -> None:
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mbit", type=float, default=20.0, help="link speed")
+    args = parser.parse_args()
+
+    encodings = ["identity", "gzip", "deflate"]
+    if zstandard is not None:
+        encodings.append("zstd")
+
+    print(
+        f"{'items':>7} {'encoding':>9} {'bytes':>11} "
+        f"{'transfer ms':>12} {'decode ms':>10} {'total ms':>9}"
+    )
+    for size in SIZES:
+        raw = json.dumps(generate(size)).encode()
+        for encoding in encodings:
+            body = raw if encoding == "identity" else compress(raw, encoding)
+            transfer = len(body) * 8 / (args.mbit * 1_000_000)
+            decode = await _decode_seconds(body)
+            print(
+                f"{size:>7} {encoding:>9} {len(body):>11} "
+                f"{transfer * 1000:>12.1f} {decode * 1000:>10.1f} "
+                f"{(transfer + decode) * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
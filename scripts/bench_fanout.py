@@ -0,0 +1,221 @@
+"""
+Measure what one webhook delivery costs inside Home Assistant.
+
+Creates M config entries on a running development instance (scripts/develop),
+replays webhook deliveries of N flights to each of them and reports, per
+delivery: client wall time, event-loop block time, state writes and
+allocated bytes. The last three are read back from the integration's own
+metrics in the config entry diagnostics, as is the time each entry took to
+set up (which must not include waiting for the scraper). Entities are only
+updated once the coalescing window closes, so fan-out and state writes are per
+publish rather than per delivery, and the number of deliveries that were
+coalesced is reported too.
+
+Start Home Assistant under tracemalloc to get allocation figures:
+
+    PYTHONTRACEMALLOC=1 scripts/develop
+
+then, from the repository root:
+
+    PYTHONPATH=. python scripts/bench_fanout.py --token <token> --entries 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+from payloads import generate
+
+from custom_components.dpk_ek_scraper.config import ScraperConfig
+from custom_components.dpk_ek_scraper.const import (
+    CONF_CLASS,
+    CONF_DEPART,
+    CONF_DEST,
+    CONF_MAX_DURATION,
+    CONF_MAX_LEGS,
+    CONF_ORIGIN,
+    CONF_RETURN,
+    CONF_WEBHOOK,
+    DEFAULT_COALESCE_MAX_LATENCY,
+    DOMAIN,
+    METRIC_ALLOCATED,
+    METRIC_LOOP_BLOCK,
+    METRIC_SETUP,
+    METRIC_STATE_WRITES,
+    METRIC_UPDATE_FANOUT,
+)
+
+FIRST_DEPARTURE = date(2027, 1, 4)
+STORAGE_TIMEOUT = 30
+
+
+async def _create_entries(
+    session: aiohttp.ClientSession, url: str, count: int
+) -> list[str]:
+    """Create config entries through the config flow and return their ids."""
+    entry_ids = []
+    for index in range(count):
+        depart = FIRST_DEPARTURE + timedelta(days=index)
+        async with session.post(
+            f"{url}/api/config/config_entries/flow", json={"handler": DOMAIN}
+        ) as response:
+            response.raise_for_status()
+            flow = await response.json()
+        async with session.post(
+            f"{url}/api/config/config_entries/flow/{flow['flow_id']}",
+            json={
+                CONF_ORIGIN: "LHR",
+                CONF_DEST: "BKK",
+                CONF_CLASS: "economy",
+                CONF_DEPART: depart.isoformat(),
+                CONF_RETURN: (depart + timedelta(days=11)).isoformat(),
+                CONF_MAX_LEGS: 2,
+                CONF_MAX_DURATION: 30.0,
+            },
+        ) as response:
+            response.raise_for_status()
+            entry_ids.append((await response.json())["result"]["entry_id"])
+    return entry_ids
+
+
+async def _webhooks(config_dir: Path, entry_ids: list[str]) -> dict[str, Any]:
+    """Read webhook ids and job ids of the entries from HA's storage."""
+    path = config_dir / ".storage" / "core.config_entries"
+    deadline = time.monotonic() + STORAGE_TIMEOUT
+    while True:
+        entries = {
+            entry["entry_id"]: entry["data"]
+            for entry in json.loads(path.read_text())["data"]["entries"]
+        }
+        if all(entry_id in entries for entry_id in entry_ids):
+            break
+        if time.monotonic() > deadline:
+            msg = f"Entries not saved to {path} within {STORAGE_TIMEOUT}s"
+            raise TimeoutError(msg)
+        await asyncio.sleep(1)
+    return {
+        entry_id: (
+            entries[entry_id][CONF_WEBHOOK],
+            ScraperConfig(
+                origin=entries[entry_id][CONF_ORIGIN],
+                destination=entries[entry_id][CONF_DEST],
+                departure_date=entries[entry_id][CONF_DEPART],
+                return_date=entries[entry_id][CONF_RETURN],
+                ticket_class=entries[entry_id][CONF_CLASS],
+            ).job_id(),
+        )
+        for entry_id in entry_ids
+    }
+
+
+async def _deliver(
+    session: aiohttp.ClientSession, url: str, webhook_id: str, body: bytes
+) -> float:
+    """Post one delivery and return the wall time until HA responded."""
+    start = time.perf_counter()
+    async with session.post(
+        f"{url}/api/webhook/{webhook_id}",
+        data=body,
+        headers={"Content-Type": "application/json"},
+    ) as response:
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def _row(name: str, samples: list[float] | dict[str, Any] | None, scale: float) -> str:
+    """Format p50/p95/max of raw samples or of a diagnostics summary."""
+    if not samples:
+        return f"{name:>16} {'n/a':>10}"
+    if isinstance(samples, dict):
+        p50, p95, top = samples["p50"], samples["p95"], samples["max"]
+    else:
+        ordered = sorted(samples)
+        p50 = statistics.median(ordered)
+        p95 = ordered[max(round(len(ordered) * 0.95) - 1, 0)]
+        top = ordered[-1]
+    return f"{name:>16} {p50 * scale:>10.1f} {p95 * scale:>10.1f} {top * scale:>10.1f}"
+
+
+async def main() -> None:
+    """Set up the entries, replay deliveries and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8123")
+    parser.add_argument("--token", required=True, help="long-lived access token")
+    parser.add_argument("--config-dir", type=Path, default=Path("config"))
+    parser.add_argument("--entries", type=int, default=2, help="config entries (M)")
+    parser.add_argument("--flights", type=int, default=100, help="flights (N)")
+    parser.add_argument("--deliveries", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the entries")
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=DEFAULT_COALESCE_MAX_LATENCY + 1,
+        help="seconds to wait for coalesced updates to be published",
+    )
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with aiohttp.ClientSession(headers=headers) as session:
+        entry_ids = await _create_entries(session, args.url, args.entries)
+        try:
+            hooks = await _webhooks(args.config_dir, entry_ids)
+            wall: list[float] = []
+            for delivery in range(args.deliveries):
+                bodies = {
+                    webhook_id: json.dumps(
+                        generate(args.flights, seed=delivery, job_id=job_id)
+                    ).encode()
+                    for webhook_id, job_id in hooks.values()
+                }
+                wall.extend(
+                    await asyncio.gather(
+                        *(
+                            _deliver(session, args.url, webhook_id, body)
+                            for webhook_id, body in bodies.items()
+                        )
+                    )
+                )
+
+            await asyncio.sleep(args.settle)
+            async with session.get(
+                f"{args.url}/api/diagnostics/config_entry/{entry_ids[0]}"
+            ) as response:
+                response.raise_for_status()
+                diagnostics = (await response.json())["data"]
+            # the domain-wide set covers the deliveries to every entry
+            overall = diagnostics["metrics"]["overall"]["histograms"]
+            counters = diagnostics["metrics"]["overall"]["counters"]
+        finally:
+            if not args.keep:
+                for entry_id in entry_ids:
+                    await session.delete(
+                        f"{args.url}/api/config/config_entries/entry/{entry_id}"
+                    )
+
+    print(
+        f"{args.entries} entries x {args.flights} flights, "
+        f"{args.deliveries} deliveries each"
+    )
+    print(f"{'per delivery':>16} {'p50':>10} {'p95':>10} {'max':>10}")
+    print(_row("wall ms", wall, 1000))
+    print(_row("loop block ms", overall.get(METRIC_LOOP_BLOCK), 1000))
+    print(_row("fan-out ms", overall.get(METRIC_UPDATE_FANOUT), 1000))
+    print(_row("state writes", overall.get(METRIC_STATE_WRITES), 1))
+    print(_row("allocated KiB", overall.get(METRIC_ALLOCATED), 1 / 1024))
+    print(_row("setup ms", overall.get(METRIC_SETUP), 1000))
+    print(
+        f"{counters.get('updates_published', 0)} publishes, "
+        f"{counters.get('updates_coalesced', 0)} deliveries coalesced"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Benchmark the api_models parse paths against synthetic results.
+
+For each payload size, reports the best-of-N time and the peak traced memory
+of Flight.from_list (outbound + return), ReturnFlight.from_list (combined)
+and FlightSearchResult.from_dict (whole document). Results are compared with
+the stored baseline and any case slower or larger than the tolerance is
+flagged, making the script exit non-zero.
+
+Usage (from the repository root, with the dev requirements installed):
+
+    PYTHONPATH=. python scripts/bench_parse.py            # compare
+    PYTHONPATH=. python scripts/bench_parse.py --save     # record a baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from payloads import generate
+
+from custom_components.dpk_ek_scraper.api_models import (
+    Flight,
+    FlightSearchResult,
+    ReturnFlight,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+SIZES = (10, 100, 1000, 10000, 50000)
+BASELINE = Path(__file__).with_name("bench_parse_baseline.json")
+
+
+def _cases(doc: dict[str, Any]) -> dict[str, Callable[[], Any]]:
+    """Return the parse paths to measure for a document."""
+    return {
+        "Flight.from_list": lambda: Flight.from_list(doc["outbound"] + doc["return"]),
+        "ReturnFlight.from_list": lambda: ReturnFlight.from_list(doc["combined"]),
+        "FlightSearchResult.from_dict": lambda: FlightSearchResult.from_dict(doc),
+    }
+
+
+def _measure(func: Callable[[], Any], rounds: int) -> tuple[float, int]:
+    """Return the best time over rounds, and the peak memory of one run."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> int:
+    """Run the benchmark, print a table and compare with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save", action="store_true", help="store as baseline")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed regression ratio"
+    )
+    parser.add_argument("--max-size", type=int, default=max(SIZES))
+    args = parser.parse_args()
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    results: dict[str, dict[str, float]] = {}
+    regressions = []
+
+    print(f"{'case':>30} {'items':>7} {'ms':>10} {'peak KiB':>10}  vs baseline")
+    for size in (s for s in SIZES if s <= args.max_size):
+        doc = generate(size)
+        rounds = args.rounds if size < 10000 else max(args.rounds // 2, 1)  # noqa: PLR2004
+        for name, func in _cases(doc).items():
+            seconds, peak = _measure(func, rounds)
+            key = f"{name}[{size}]"
+            results[key] = {"seconds": seconds, "peak_bytes": peak}
+            note = ""
+            if key in baseline:
+                ratio = seconds / baseline[key]["seconds"]
+                mem_ratio = peak / max(baseline[key]["peak_bytes"], 1)
+                note = f"time x{ratio:.2f}, memory x{mem_ratio:.2f}"
+                if max(ratio, mem_ratio) > 1 + args.tolerance:
+                    regressions.append(key)
+                    note += "  REGRESSION"
+            print(
+                f"{name:>30} {size:>7} {seconds * 1000:>10.2f} "
+                f"{peak / 1024:>10.0f}  {note}"
+            )
+
+    if args.save:
+        BASELINE.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {BASELINE}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
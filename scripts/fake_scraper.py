@@ -0,0 +1,171 @@
+"""
+Local stand-in for the Node-RED scraper.
+
+Serves the same endpoints as the real flow:
+
+- POST /ek-scraper-schedule acknowledges a trigger straight away, then after
+  a simulated scrape posts a generated result to the trigger's webhook_url.
+- GET /ek-scraper runs a simulated scrape and returns the result directly.
+
+Scrape latency, failure rates and payload sizes are configurable, so the
+integration's trigger -> webhook loop can be exercised without jupiter:1880.
+Point an entry's "Scraper URL" option at this service to use it with Home
+Assistant. Usage (from the repository root):
+
+    PYTHONPATH=. python scripts/fake_scraper.py --port 1880 --latency 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+from payloads import generate
+
+from custom_components.dpk_ek_scraper.config import ScraperConfig
+
+_LOGGER = logging.getLogger("fake_scraper")
+
+
+@dataclass
+class Behaviour:
+    """How the fake scraper behaves."""
+
+    latency: float = 5.0
+    jitter: float = 0.5
+    fail_rate: float = 0.0
+    drop_rate: float = 0.0
+    flights: tuple[int, int] = (100, 100)
+    compress: bool = False
+    rnd: random.Random = field(default_factory=lambda: random.Random(1))  # noqa: S311
+
+    async def scrape(self, job_id: str) -> bytes:
+        """Simulate a scrape and return the encoded result document."""
+        await asyncio.sleep(
+            max(self.latency * (1 + self.rnd.uniform(-self.jitter, self.jitter)), 0)
+        )
+        size = self.rnd.randint(*self.flights)
+        doc = generate(size, seed=self.rnd.randrange(1 << 30), job_id=job_id)
+        return json.dumps(doc).encode()
+
+
+async def _callback(
+    app: web.Application, webhook_url: str, job_id: str, behaviour: Behaviour
+) -> None:
+    """Post a simulated result back to the webhook, unless it is dropped."""
+    body = await behaviour.scrape(job_id)
+    if behaviour.rnd.random() < behaviour.drop_rate:
+        _LOGGER.info("Dropping result for %s", job_id)
+        return
+    headers = {"Content-Type": "application/json"}
+    if behaviour.compress:
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    try:
+        async with app["session"].post(
+            webhook_url, data=body, headers=headers
+        ) as response:
+            _LOGGER.info(
+                "Posted %d bytes for %s: %s", len(body), job_id, response.status
+            )
+    except aiohttp.ClientError as err:
+        _LOGGER.warning("Webhook post for %s failed: %s", job_id, err)
+
+
+async def handle_schedule(request: web.Request) -> web.Response:
+    """Acknowledge a trigger and schedule the webhook callback."""
+    behaviour: Behaviour = request.app["behaviour"]
+    payload: dict[str, Any] = await request.json()
+    if behaviour.rnd.random() < behaviour.fail_rate:
+        return web.Response(status=500, text="simulated failure")
+    task = asyncio.create_task(
+        _callback(request.app, payload["webhook_url"], payload["job_id"], behaviour)
+    )
+    request.app["tasks"].add(task)
+    task.add_done_callback(request.app["tasks"].discard)
+    return web.Response(text=f"queued {payload['job_id']}")
+
+
+async def handle_fetch(request: web.Request) -> web.Response:
+    """Run a simulated scrape and return the result in the response."""
+    behaviour: Behaviour = request.app["behaviour"]
+    if behaviour.rnd.random() < behaviour.fail_rate:
+        return web.Response(status=500, text="simulated failure")
+    query = request.query
+    job_id = ScraperConfig(
+        origin=query.get("origin", ""),
+        destination=query.get("destination", ""),
+        departure_date=query.get("depart", ""),
+        return_date=query.get("return", ""),
+        ticket_class=query.get("class", ""),
+    ).job_id()
+    return web.Response(
+        body=await behaviour.scrape(job_id), content_type="application/json"
+    )
+
+
+def create_app(behaviour: Behaviour) -> web.Application:
+    """Create the fake scraper application."""
+    app = web.Application()
+    app["behaviour"] = behaviour
+    app["tasks"] = set()
+
+    async def _session(app: web.Application) -> Any:
+        app["session"] = aiohttp.ClientSession()
+        yield
+        await app["session"].close()
+
+    app.cleanup_ctx.append(_session)
+    app.router.add_post("/ek-scraper-schedule", handle_schedule)
+    app.router.add_get("/ek-scraper", handle_fetch)
+    return app
+
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options that configure a Behaviour."""
+    parser.add_argument("--latency", type=float, default=5.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="+/- fraction")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="HTTP 500s")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="no callback")
+    parser.add_argument("--min-flights", type=int, default=100)
+    parser.add_argument("--max-flights", type=int, default=100)
+    parser.add_argument("--gzip", action="store_true", help="gzip webhook bodies")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def behaviour_from_arguments(args: argparse.Namespace) -> Behaviour:
+    """Build a Behaviour from parsed arguments."""
+    return Behaviour(
+        latency=args.latency,
+        jitter=args.jitter,
+        fail_rate=args.fail_rate,
+        drop_rate=args.drop_rate,
+        flights=(args.min_flights, max(args.min_flights, args.max_flights)),
+        compress=args.gzip,
+        rnd=random.Random(args.seed),  # noqa: S311
+    )
+
+
+def main() -> None:
+    """Run the fake scraper until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="0.0.0.0")  # noqa: S104
+    parser.add_argument("--port", type=int, default=1880)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(
+        create_app(behaviour_from_arguments(args)), host=args.host, port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Load test the trigger -> scrape -> webhook loop.
+
+Runs many concurrent jobs against a scraper (by default an in-process fake
+scraper, or any URL such as the real Node-RED flow) and receives the webhook
+callbacks on a local sink. Each job triggers a scrape, waits for its
+callback and repeats. Reports throughput and trigger-to-callback latency
+percentiles, plus trigger failures and lost callbacks.
+
+Usage (from the repository root):
+
+    PYTHONPATH=. python scripts/load_test.py --jobs 50 --rounds 5 --latency 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+from fake_scraper import add_behaviour_arguments, behaviour_from_arguments, create_app
+
+from custom_components.dpk_ek_scraper.compression import CHUNK_SIZE, async_read_body
+
+
+class Sink:
+    """Webhook receiver resolving the pending callback of each job."""
+
+    def __init__(self) -> None:
+        """Initialise with no pending jobs."""
+        self.pending: dict[str, asyncio.Future[int]] = {}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Resolve the job's future with the size of the received body."""
+        body = await async_read_body(request.content.iter_chunked(CHUNK_SIZE))
+        job_id = request.match_info["job_id"]
+        future = self.pending.get(job_id)
+        if future is not None and not future.done():
+            future.set_result(len(body))
+        return web.Response()
+
+
+async def _start(app: web.Application, host: str, port: int) -> web.AppRunner:
+    """Start an application on host:port."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def _job(  # noqa: PLR0913
+    session: aiohttp.ClientSession,
+    sink: Sink,
+    scraper_url: str,
+    webhook_base: str,
+    job_id: str,
+    rounds: int,
+    callback_timeout: float,
+    stats: dict[str, Any],
+) -> None:
+    """Run one job's trigger/callback cycles."""
+    for _ in range(rounds):
+        future = sink.pending[job_id] = asyncio.get_running_loop().create_future()
+        start = time.perf_counter()
+        try:
+            async with session.post(
+                f"{scraper_url}/ek-scraper-schedule",
+                json={
+                    "job_id": job_id,
+                    "max_legs": 2,
+                    "max_duration": 30,
+                    "webhook_url": f"{webhook_base}/{job_id}",
+                },
+            ) as response:
+                response.raise_for_status()
+        except aiohttp.ClientError:
+            stats["failed"] += 1
+            continue
+        try:
+            stats["bytes"] += await asyncio.wait_for(future, callback_timeout)
+        except TimeoutError:
+            stats["lost"] += 1
+            continue
+        stats["latency"].append(time.perf_counter() - start)
+
+
+async def main() -> None:
+    """Run the load test and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=20, help="concurrent jobs")
+    parser.add_argument("--rounds", type=int, default=3, help="cycles per job")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per callback")
+    parser.add_argument(
+        "--scraper-url", help="use this scraper instead of the in-process fake"
+    )
+    parser.add_argument("--sink-host", default="127.0.0.1")
+    parser.add_argument("--sink-port", type=int, default=18123)
+    parser.add_argument("--fake-port", type=int, default=18800)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    sink = Sink()
+    sink_app = web.Application(client_max_size=256 * 1024 * 1024)
+    sink_app.router.add_post("/api/webhook/{job_id}", sink.handle)
+    runners = [await _start(sink_app, args.sink_host, args.sink_port)]
+    scraper_url = args.scraper_url
+    if scraper_url is None:
+        fake = create_app(behaviour_from_arguments(args))
+        runners.append(await _start(fake, "127.0.0.1", args.fake_port))
+        scraper_url = f"http://127.0.0.1:{args.fake_port}"
+
+    stats: dict[str, Any] = {"latency": [], "failed": 0, "lost": 0, "bytes": 0}
+    start = time.perf_counter()
+    try:
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(
+                *(
+                    _job(
+                        session,
+                        sink,
+                        scraper_url.rstrip("/"),
+                        f"http://{args.sink_host}:{args.sink_port}/api/webhook",
+                        f"load_{index:04d}",
+                        args.rounds,
+                        args.timeout,
+                        stats,
+                    )
+                    for index in range(args.jobs)
+                )
+            )
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+    elapsed = time.perf_counter() - start
+
+    latency = sorted(stats["latency"])
+    print(f"{args.jobs} jobs x {args.rounds} rounds against {scraper_url}")
+    print(
+        f"completed {len(latency)}, trigger failures {stats['failed']}, "
+        f"lost callbacks {stats['lost']}, in {elapsed:.1f}s"
+    )
+    print(
+        f"throughput {len(latency) / elapsed:.2f} scrapes/s, "
+        f"{stats['bytes'] / elapsed / 1024:.0f} KiB/s"
+    )
+    if len(latency) > 1:
+        pcts = statistics.quantiles(latency, n=100, method="inclusive")
+        print(
+            f"latency s: p50 {pcts[49]:.2f}  p95 {pcts[94]:.2f}  "
+            f"p99 {pcts[98]:.2f}  max {latency[-1]:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
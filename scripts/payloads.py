@@ -0,0 +1,150 @@
+"""
+Seeded synthetic result documents, shaped like the Node-RED scraper's output.
+
+The generator produces 'outbound', 'return', 'combined' and 'tracker'
+sections. Combined itineraries are pairs of one-way flights, so for n
+itineraries roughly sqrt(n) flights are generated in each direction.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+AIRPORTS = {
+    "LHR": "London Heathrow",
+    "LGW": "London Gatwick",
+    "MAN": "Manchester",
+    "DXB": "Dubai International",
+    "BKK": "Suvarnabhumi",
+    "SIN": "Singapore Changi",
+    "SYD": "Sydney Kingsford Smith",
+    "MLE": "Velana International",
+}
+AIRCRAFT = ("Airbus A380-800", "Boeing 777-300ER", "Boeing 777-200LR", "A350-900")
+TRACKER_STEPS = ("queued", "browser_start", "search", "parse", "post")
+
+
+def _flight(
+    rnd: random.Random, fid: str, origin: str, destination: str, day: datetime
+) -> dict[str, Any]:
+    """Build a one-way flight with one to three legs."""
+    stops = rnd.choices((0, 1, 2), weights=(5, 4, 1))[0]
+    depart = day.replace(hour=rnd.randrange(24), minute=rnd.choice((0, 15, 30, 45)))
+    hours = round(rnd.uniform(6.5, 9.0) + stops * rnd.uniform(2.0, 9.0), 2)
+    arrive = depart + timedelta(hours=hours)
+    return {
+        "id": fid,
+        "departure": {
+            "time": depart.isoformat(),
+            "airport": origin,
+            "airport_name": AIRPORTS[origin],
+        },
+        "arrival": {
+            "time": arrive.isoformat(),
+            "airport": destination,
+            "airport_name": AIRPORTS[destination],
+        },
+        "duration": {
+            "length": f"{int(hours)}h {round(hours % 1 * 60):02d}m",
+            "hours": hours,
+        },
+        "price": {"currency": "GBP", "amount": round(rnd.uniform(180, 1400), 2)},
+        "legs": [
+            {
+                "flight_number": f"EK{rnd.randrange(1, 999):03d}",
+                "aircraft": rnd.choice(AIRCRAFT),
+            }
+            for _ in range(stops + 1)
+        ],
+    }
+
+
+def _combine(out: dict[str, Any], ret: dict[str, Any]) -> dict[str, Any]:
+    """Build a combined itinerary from two one-way flights."""
+    out_price, ret_price = out["price"]["amount"], ret["price"]["amount"]
+    out_hours, ret_hours = out["duration"]["hours"], ret["duration"]["hours"]
+    return {
+        "id": f"{out['id']}_{ret['id']}",
+        "schedule": {
+            "outbound": {
+                "depart": out["departure"]["time"],
+                "airport": f"{out['departure']['airport']}-{out['arrival']['airport']}",
+                "arrive": out["arrival"]["time"],
+            },
+            "return": {
+                "depart": ret["departure"]["time"],
+                "airport": f"{ret['departure']['airport']}-{ret['arrival']['airport']}",
+                "arrive": ret["arrival"]["time"],
+            },
+        },
+        "duration": {
+            "outbound": out_hours,
+            "return": ret_hours,
+            "total": round(out_hours + ret_hours, 2),
+        },
+        "price": {
+            "outbound": out_price,
+            "return": ret_price,
+            "total": round(out_price + ret_price, 2),
+            "currency": "GBP",
+        },
+        "legs": {
+            "outbound": [leg["flight_number"] for leg in out["legs"]],
+            "return": [leg["flight_number"] for leg in ret["legs"]],
+        },
+    }
+
+
+def generate(
+    itineraries: int,
+    seed: int = 1,
+    origin: str = "LHR",
+    destination: str = "BKK",
+    job_id: str = "bench",
+) -> dict[str, Any]:
+    """
+    Generate a result document with the given number of combined itineraries.
+
+    Args:
+        itineraries (int): Number of entries in the 'combined' section.
+        seed (int): Seed for the random generator, so runs are repeatable.
+        origin (str): Origin airport code.
+        destination (str): Destination airport code.
+        job_id (str): The job_id put in the envelope.
+
+    Returns:
+        dict[str, Any]: A document accepted by FlightSearchResult.from_dict.
+
+    """
+    rnd = random.Random(seed)  # noqa: S311
+    per_direction = max(math.ceil(math.sqrt(itineraries)), 1)
+    out_day = datetime(2026, 4, 11, tzinfo=UTC)
+    ret_day = datetime(2026, 4, 22, tzinfo=UTC)
+    outbound = [
+        _flight(rnd, f"O{i:05d}", origin, destination, out_day)
+        for i in range(per_direction)
+    ]
+    return_ = [
+        _flight(rnd, f"R{i:05d}", destination, origin, ret_day)
+        for i in range(math.ceil(itineraries / per_direction))
+    ]
+    combined = [_combine(out, ret) for out in outbound for ret in return_][:itineraries]
+
+    stamp = datetime(2026, 4, 1, 6, 0, tzinfo=UTC)
+    tracker = []
+    for step in TRACKER_STEPS:
+        stamp += timedelta(seconds=rnd.uniform(0.5, 40.0))
+        tracker.append(
+            {"step": step, "timestamp": stamp.isoformat(), "message": f"{step} ok"}
+        )
+    return {
+        "job_id": job_id,
+        "result": 0,
+        "outbound": outbound,
+        "return": return_,
+        "combined": combined,
+        "tracker": tracker,
+    }
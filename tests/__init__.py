@@ -0,0 +1 @@
+"""Tests for the dpk_ek_scraper integration."""
@@ -0,0 +1,78 @@
+"""Tests for reading compressed webhook bodies."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import zlib
+from typing import TYPE_CHECKING
+
+import pytest
+
+from custom_components.dpk_ek_scraper.api_models import REASON_JSON, PayloadError
+from custom_components.dpk_ek_scraper.compression import async_read_body
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+BODY = b'{"job_id": "lon_bkk", "combined": []}' * 200
+
+
+async def _chunks(body: bytes, size: int) -> AsyncIterator[bytes]:
+    """Yield a body in chunks, like aiohttp's StreamReader.iter_chunked."""
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+def _read(body: bytes, size: int = 1024, max_size: int = 1 << 20) -> bytes:
+    """Read a body through async_read_body."""
+    return bytes(asyncio.run(async_read_body(_chunks(body, size), max_size)))
+
+
+def _rejected(body: bytes, size: int = 1024, max_size: int = 1 << 20) -> str:
+    """Read a body that must be rejected, returning the error message."""
+    with pytest.raises(PayloadError) as err:
+        _read(body, size, max_size)
+    assert err.value.reason == REASON_JSON
+    return str(err.value)
+
+
+@pytest.mark.parametrize("size", [1, 3, 1024, 1 << 20])
+def test_plain_gzip_zlib_and_raw_deflate(size: int) -> None:
+    """Every supported encoding decodes to the original body."""
+    raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    encoded = [
+        BODY,
+        gzip.compress(BODY),
+        zlib.compress(BODY),
+        raw_deflate.compress(BODY) + raw_deflate.flush(),
+    ]
+    for body in encoded:
+        assert _read(body, size) == BODY
+
+
+def test_gzip_members_are_concatenated() -> None:
+    """A body of several gzip members decodes to all of them, as with gzip -d."""
+    half = len(BODY) // 2
+    body = gzip.compress(BODY[:half]) + gzip.compress(BODY[half:])
+    for size in (1, 7, 1024):
+        assert _read(body, size) == BODY
+
+
+@pytest.mark.parametrize("encode", [gzip.compress, zlib.compress])
+def test_truncated_stream_is_rejected(encode: Callable[[bytes], bytes]) -> None:
+    """A stream cut short is not taken for a shorter body."""
+    body = encode(BODY)
+    assert "truncated" in _rejected(body[:-10])
+
+
+def test_trailing_garbage_is_rejected() -> None:
+    """Data after the end of a stream that is not a gzip member is refused."""
+    assert "trailing" in _rejected(gzip.compress(BODY) + b"junk")
+    assert "trailing" in _rejected(zlib.compress(BODY) + b"\x1f\x8b")
+
+
+def test_decoded_size_is_capped() -> None:
+    """A small body that expands past max_size is refused."""
+    bomb = gzip.compress(b" " * (4 << 20))
+    assert "exceeds" in _rejected(bomb, max_size=1 << 20)